@@ -0,0 +1,104 @@
+"""
+Per-request latency of the chatbot/quiz HTTP calls with and without pooling.
+
+Starts a local stub of the /chat and /quiz endpoints (or targets --url)
+and sends the same requests with a bare requests.post/get, which opens a
+new connection every time, and with the shared pooled session:
+
+    python benchmark_http_client.py
+    python benchmark_http_client.py -n 200 --delay 0.01
+    python benchmark_http_client.py --url https://<tunnel> -n 20
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from http_client import TIMEOUT, make_session
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the server keeps connections open for clients that reuse them
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY a reused
+    # connection would wait on Nagle/delayed-ACK and measure that instead
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def _reply(self, payload: dict) -> None:
+        time.sleep(self.delay)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply({'response': 'A pointer holds the address of another variable.'})
+
+    def do_GET(self):
+        self._reply({'quiz': 'Q1. What does the & operator return?'})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(delay: float) -> ThreadingHTTPServer:
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(http, url: str, count: int) -> list:
+    """Seconds per request, alternating chat and quiz calls like a study session"""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        if i % 2 == 0:
+            response = http.post(f"{url}/chat", json={'user_query': 'What is a pointer?'}, timeout=TIMEOUT)
+        else:
+            response = http.get(f"{url}/quiz?topic=Pointers%20in%20C%2B%2B", timeout=TIMEOUT)
+        response.raise_for_status()
+        response.json()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(round(0.95 * len(ordered))) - 1)]
+    print(f"{name:<10} mean {statistics.mean(latencies) * 1000:7.2f}ms   "
+          f"p50 {statistics.median(latencies) * 1000:7.2f}ms   p95 {p95 * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="server to test instead of the local stub")
+    parser.add_argument("-n", "--requests", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.0, help="stub server think time per request")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = start_stub_server(args.delay)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Warm up both paths so neither pays for imports or DNS on its first call
+    measure(requests, url, 2)
+    session = make_session()
+    measure(session, url, 2)
+
+    print(f"{args.requests} requests to {url}")
+    report("unpooled", measure(requests, url, args.requests))
+    report("pooled", measure(session, url, args.requests))
+
+    if server is not None:
+        server.shutdown()
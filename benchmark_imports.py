@@ -0,0 +1,59 @@
+"""
+Measure cold-start import time of the project's entry points.
+
+Each module is imported in a fresh interpreter with -X importtime, so the
+numbers include everything it pulls in at load time:
+
+    python benchmark_imports.py
+    python benchmark_imports.py knowledge_graph ngrok_server --top 10
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = ['knowledge_graph', 'ngrok_server', 'FRONTEND', 'KG_Frontend']
+
+
+def measure(module: str, top: int):
+    """Wall time of `import module` and its slowest cumulative imports"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented two spaces per level after the separator
+        imports.append((int(cumulative), name[1:]))
+
+    # Report the entry point's direct imports; their cumulative time includes children
+    roots = [
+        (us, name.strip()) for us, name in imports
+        if (len(name) - len(name.lstrip())) // 2 <= 1 and name.strip() != module
+    ]
+    roots.sort(reverse=True)
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'
+    return elapsed, roots[:top], error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        elapsed, slowest, error = measure(module, args.top)
+        status = f"  ({error})" if error else ""
+        print(f"{module:<20} {elapsed:6.2f}s{status}")
+        for us, name in slowest:
+            print(f"    {us / 1e6:6.2f}s  {name}")
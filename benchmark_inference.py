@@ -0,0 +1,75 @@
+"""
+Compare prerequisite-extraction throughput of the old barrier-per-batch loop
+against the sliding-window scheduler, with per-prompt and batched backends.
+
+Uses FakeBackend with randomised latency so no Ollama host is needed:
+
+    python benchmark_inference.py --csv "Starting Out.csv" --rows 80
+"""
+import argparse
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from langchain_core.runnables import RunnableLambda
+
+from inference_backends import BatchedOllamaBackend, FakeBackend
+from knowledge_graph import KnowledgeGraphBuilder
+
+
+def make_responder(mean_latency: float, jitter: float):
+    """Fake LLM that sleeps for a variable time, like a busy Ollama host"""
+    def respond(prompt: str) -> str:
+        time.sleep(max(0.0, random.gauss(mean_latency, jitter)))
+        return '{"prerequisites": ["Arrays", "Pointers"]}'
+    return respond
+
+
+def barrier_build(builder: KnowledgeGraphBuilder, df: pd.DataFrame, batch_size: int) -> None:
+    """The pre-scheduler behaviour: submit a batch, wait for all of it, repeat"""
+    all_topics = [builder.clean_topic_name(title) for title in df['Title'].tolist()]
+    with ThreadPoolExecutor(max_workers=batch_size) as executor:
+        for i in range(0, len(df), batch_size):
+            batch = df.iloc[i:i + batch_size]
+            futures = [
+                executor.submit(builder.process_topic, builder.clean_topic_name(row['Title']),
+                                row['Content'], all_topics)
+                for _, row in batch.iterrows()
+            ]
+            for future in futures:
+                future.result()
+
+
+def run(label: str, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.2f}s  {rows / elapsed:8.2f} topics/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="Starting Out.csv")
+    parser.add_argument("--rows", type=int, default=80)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per prompt")
+    parser.add_argument("--jitter", type=float, default=0.03)
+    args = parser.parse_args()
+
+    logging.getLogger("knowledge_graph").setLevel(logging.WARNING)
+    random.seed(0)
+
+    df = pd.read_csv(args.csv).head(args.rows)
+    rows = len(df)
+    responder = make_responder(args.latency, args.jitter)
+
+    per_prompt = KnowledgeGraphBuilder(cache_path=None, backend=FakeBackend(responder))
+    run("barrier batches (previous behaviour)", lambda: barrier_build(per_prompt, df, args.batch_size))
+    run("sliding window, per-prompt backend", lambda: per_prompt.build_knowledge_graph(df, args.batch_size))
+
+    # llm.batch on a stand-in LLM, which like Ollama's sends one request per prompt
+    batched = KnowledgeGraphBuilder(cache_path=None, backend=BatchedOllamaBackend(RunnableLambda(responder)))
+    run("sliding window, batched backend (8)", lambda: batched.build_knowledge_graph(df, args.batch_size))
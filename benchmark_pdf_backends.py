@@ -0,0 +1,60 @@
+"""
+Compare the PdfDocument backends on one book.
+
+For each installed backend this times opening the file, reading the
+outline and extracting the text of the front matter (the pages the text
+TOC scan looks at) and of every page:
+
+    python benchmark_pdf_backends.py
+    python benchmark_pdf_backends.py "PF and DS.pdf" --backends pymupdf pypdf2
+"""
+import argparse
+import time
+
+from pdf_document import BACKENDS, PdfDocument
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def measure(path: str, backend: str, max_pages: int = None):
+    """Timings and output sizes of one backend on one PDF"""
+    open_time, doc = timed(PdfDocument, path, backend)
+    with doc:
+        outline_time, outline = timed(doc.outline)
+        page_count = min(len(doc), max_pages) if max_pages else len(doc)
+        front_pages = min(int(len(doc) * 0.15), 20)
+
+        front_time, _ = timed(lambda: [doc.page_text(i) for i in range(front_pages)])
+        text_time, texts = timed(lambda: [doc.page_text(i) for i in range(page_count)])
+    return {
+        'open': open_time,
+        'outline': outline_time,
+        'outline_items': len(outline),
+        'front_matter': front_time,
+        'all_pages': text_time,
+        'pages': page_count,
+        'chars': sum(len(text) for text in texts),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", default="BOOKS_DATASET/DS_b2.pdf")
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    parser.add_argument("--max-pages", type=int, default=None, help="only extract this many pages")
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'open':>7} {'outline':>8} {'items':>6} {'front':>7} {'pages':>6} {'text':>8} {'pages/s':>8} {'chars':>9}")
+    for backend in args.backends:
+        try:
+            r = measure(args.pdf, backend, args.max_pages)
+        except ImportError as e:
+            print(f"{backend:<10} not installed ({e})")
+            continue
+        rate = r['pages'] / r['all_pages'] if r['all_pages'] else float('inf')
+        print(f"{backend:<10} {r['open']:6.3f}s {r['outline']:7.3f}s {r['outline_items']:6d} "
+              f"{r['front_matter']:6.3f}s {r['pages']:6d} {r['all_pages']:7.2f}s {rate:8.1f} {r['chars']:9d}")
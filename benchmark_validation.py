@@ -0,0 +1,135 @@
+"""
+Micro-benchmark of topic/prerequisite validation on the bundled CSVs.
+
+Compares the original per-call regex loops (reproduced below) with the
+precompiled KnowledgeGraphBuilder validators and checks both agree, then
+checks how TopicIndex resolves typical LLM suggestions against the real
+titles of Starting Out.csv:
+
+    python benchmark_validation.py --repeat 5
+"""
+import argparse
+import re
+import time
+
+import pandas as pd
+
+from knowledge_graph import KnowledgeGraphBuilder
+from topic_index import TopicIndex
+
+CSV_FILES = ['PF and DS.csv', 'Starting Out.csv']
+
+# Suggestion -> topic it must resolve to in Starting Out.csv, or None when it
+# is too vague to pick one of several titles mentioning the word
+EXPECTED_MATCHES = {
+    'Variables': None,               # not "Pointer Variables"
+    'Functions': None,               # not "Function Templates"
+    'Classes': None,                 # not "Class Templates"
+    'Strings': None,                 # not "C-Strings"
+    'Operators': None,               # not "Logical Operators"
+    'Pointers': None,
+    'Function Parameters': None,     # not "Pointers as Function Parameters"
+    'pointer variable': 'Pointer Variables',
+    'Poniter Variables': 'Pointer Variables',
+    'Variables & Literals': 'Variables and Literals',
+    'Logical Operator': 'Logical Operators',
+    'The string class': 'The C++ string Class',
+    'Reference Variables as Parameters': 'Using Reference Variables as Parameters',
+}
+
+
+def legacy_is_valid_topic(builder: KnowledgeGraphBuilder, topic: str) -> bool:
+    if any(re.match(pattern, topic.lower()) for pattern in builder.invalid_patterns):
+        return False
+    if hasattr(builder, 'current_domain'):
+        topic_lower = topic.lower()
+        domain_keywords = builder.technical_keywords[builder.current_domain]
+        return any(keyword in topic_lower for keyword in domain_keywords)
+    return True
+
+
+def legacy_validate_prerequisites(topic: str, prerequisites: list) -> list:
+    skip_patterns = list(KnowledgeGraphBuilder.SKIP_PATTERNS)
+    complexity_levels = {level: list(keywords) for level, keywords in KnowledgeGraphBuilder.COMPLEXITY_LEVELS.items()}
+
+    topic_level = None
+    topic_lower = topic.lower()
+    for level, keywords in complexity_levels.items():
+        if any(keyword in topic_lower for keyword in keywords):
+            topic_level = level
+            break
+
+    cleaned_prereqs = []
+    if any(re.search(pattern, topic, re.IGNORECASE) for pattern in skip_patterns):
+        return []
+
+    for prereq in prerequisites:
+        if not prereq or any(re.search(pattern, prereq, re.IGNORECASE) for pattern in skip_patterns):
+            continue
+        prereq_lower = prereq.lower()
+        prereq_level = None
+        for level, keywords in complexity_levels.items():
+            if any(keyword in prereq_lower for keyword in keywords):
+                prereq_level = level
+                break
+        if topic_level and prereq_level:
+            levels = ['basic', 'intermediate', 'advanced', 'expert']
+            if 0 <= levels.index(topic_level) - levels.index(prereq_level) <= 2:
+                cleaned_prereqs.append(prereq)
+        elif prereq != topic:
+            cleaned_prereqs.append(prereq)
+
+    return list(dict.fromkeys(cleaned_prereqs))[:3]
+
+
+def check_topic_index(builder: KnowledgeGraphBuilder, path: str = 'Starting Out.csv') -> None:
+    titles = [builder.clean_topic_name(title) for title in pd.read_csv(path)['Title'].astype(str)]
+    index = TopicIndex(titles, builder.prerequisite_match_threshold)
+    for suggestion, expected in EXPECTED_MATCHES.items():
+        resolved = index.resolve(suggestion)
+        assert resolved == expected, f"{suggestion!r} resolved to {resolved!r}, expected {expected!r}"
+    print(f"TopicIndex resolves {len(EXPECTED_MATCHES)} suggestions as expected")
+
+
+def timed(fn, repeat: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        # Start every run cold, so the best of them is not just lru_cache hits
+        KnowledgeGraphBuilder.complexity_level.cache_clear()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--window", type=int, default=8, help="earlier topics paired with each topic")
+    args = parser.parse_args()
+
+    builder = KnowledgeGraphBuilder(cache_path=None)
+    builder.set_domain('programming')
+
+    titles = []
+    for path in CSV_FILES:
+        titles.extend(pd.read_csv(path)['Title'].astype(str).tolist())
+    # Use the raw titles too, so the numbered-heading patterns get exercised
+    topics = titles + [builder.clean_topic_name(title) for title in titles]
+    pairs = [(topic, topics[max(0, i - args.window):i]) for i, topic in enumerate(topics)]
+    print(f"{len(topics)} topics, {sum(len(p) for _, p in pairs)} topic/prerequisite pairs")
+
+    old_time, old_valid = timed(lambda: [legacy_is_valid_topic(builder, t) for t in topics], args.repeat)
+    new_time, new_valid = timed(lambda: [builder.is_valid_topic(t) for t in topics], args.repeat)
+    assert old_valid == new_valid, "is_valid_topic results differ"
+    print(f"is_valid_topic          old {old_time * 1000:8.2f} ms   new {new_time * 1000:8.2f} ms   "
+          f"x{old_time / new_time:.1f}")
+
+    old_time, old_prereqs = timed(lambda: [legacy_validate_prerequisites(t, p) for t, p in pairs], args.repeat)
+    new_time, new_prereqs = timed(lambda: [builder.validate_prerequisites(t, p) for t, p in pairs], args.repeat)
+    assert old_prereqs == new_prereqs, "validate_prerequisites results differ"
+    print(f"validate_prerequisites  old {old_time * 1000:8.2f} ms   new {new_time * 1000:8.2f} ms   "
+          f"x{old_time / new_time:.1f}")
+
+    check_topic_index(builder)
@@ -1,4 +1,5 @@
 import requests
+from http_client import TIMEOUT, get_session
 
 NGROK_URL =  "https://0be3-34-83-226-12CC9.ngrok-free.app"  #REPLACE WITH YOUR OWN NGROK URL
 
@@ -23,7 +24,8 @@ def ask_chatbot(question, ngrok_url=None):
     payload = {"user_query": question}
 
     try:
-        response = requests.post(endpoint, json=payload, timeout=60)
+        # Shared keep-alive session: no new TCP/TLS handshake per question
+        response = get_session().post(endpoint, json=payload, timeout=TIMEOUT)
         response.raise_for_status()  # Raises an exception for 4xx or 5xx errors
         data = response.json()
         return data.get("response", "No 'response' field in JSON.")
@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointJournal:
+    """Append-only JSONL record of processed topics and their edges.
+
+    Each line is {"topic", "content_hash", "edges"}. Lines are flushed as
+    soon as a batch completes, so an interrupted run loses at most the
+    batches still in flight.
+    """
+
+    def __init__(self, path: str, resume: bool = False, fsync_every: int = 20):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.completed = {}
+        self._pending_fsync = 0
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self.completed = self.load(path)
+            logger.info(f"Resuming from {path}: {len(self.completed)} topics already processed")
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # Terminate a half-written last line before appending
+                    self._file.write('\n')
+
+    @staticmethod
+    def load(path: str) -> dict:
+        """Map (topic, content_hash) -> edges from an existing journal"""
+        completed = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                    completed[(entry['topic'], entry['content_hash'])] = entry['edges']
+                except (json.JSONDecodeError, KeyError):
+                    # A crash mid-write leaves a truncated last line; skip it
+                    logger.warning(f"Ignoring unreadable journal line {line_no} in {path}")
+        return completed
+
+    def is_done(self, topic: str, content_hash: str) -> bool:
+        return (topic, content_hash) in self.completed
+
+    def edges_for(self, topic: str, content_hash: str) -> list:
+        """Edges recorded for an already processed topic"""
+        return self.completed.get((topic, content_hash), [])
+
+    def record(self, entries: list) -> None:
+        """Append (topic, content_hash, edges) tuples and flush them to disk"""
+        with self._lock:
+            for topic, content_hash, edges in entries:
+                self.completed[(topic, content_hash)] = edges
+                self._file.write(json.dumps({
+                    "topic": topic,
+                    "content_hash": content_hash,
+                    "edges": edges
+                }) + '\n')
+            self._file.flush()
+            self._pending_fsync += len(entries)
+            if self._pending_fsync >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._pending_fsync = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
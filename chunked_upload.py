@@ -0,0 +1,180 @@
+"""
+Compressed, resumable, content-addressed uploads of section tables.
+
+The client serialises a DataFrame to NDJSON, names it by the SHA-256 of
+those bytes, gzips it and sends it in chunks that each carry their own
+SHA-256:
+
+    POST /uploads                         {"sha256": ..., "encoding": "gzip"}
+        -> {"status": "duplicate", "job_id": ...} if the server already has it
+        -> {"status": "pending", "received": [chunk indexes already stored]}
+    PUT  /uploads/<sha256>/chunks/<index>  chunk bytes, X-Chunk-SHA256 header
+    POST /uploads/<sha256>/complete        {"chunks": n} -> {"job_id": ...}
+
+Chunks the server already holds are skipped, so an interrupted upload
+resumes where it stopped, and identical books are never sent twice.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import zlib
+
+import pandas as pd
+import requests
+
+CHUNK_SIZE = 256 * 1024
+
+# Server-side limits: one chunk's bytes, chunks per upload and the size of
+# the unpacked NDJSON (a long textbook is a few MB)
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_CHUNKS = 1024
+MAX_UPLOAD_SIZE = 256 * 1024 * 1024
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def dataframe_to_ndjson(df: pd.DataFrame) -> bytes:
+    """One JSON object per row, in column order, so equal tables give equal bytes"""
+    return ''.join(
+        json.dumps(record, ensure_ascii=False) + '\n'
+        for record in df.to_dict(orient='records')
+    ).encode('utf-8')
+
+
+def ndjson_to_dataframe(data: bytes) -> pd.DataFrame:
+    # json.loads keeps every value as sent, unlike pd.read_json's type inference
+    return pd.DataFrame([json.loads(line) for line in data.decode('utf-8').splitlines() if line])
+
+
+def upload_dataframe(server_url: str, df: pd.DataFrame, session=None,
+                     chunk_size: int = CHUNK_SIZE, max_retries: int = 3) -> dict:
+    """
+    Upload a section table and return the server's reply with its job_id
+
+    The reply's status is 'duplicate' when the server had already received
+    an identical table, in which case nothing but the hash was sent.
+    """
+    http = session or requests
+    raw = dataframe_to_ndjson(df)
+    content_hash = sha256_hex(raw)
+    compressed = gzip.compress(raw, mtime=0)
+    chunks = [compressed[i:i + chunk_size] for i in range(0, len(compressed), chunk_size)]
+
+    response = http.post(f"{server_url}/uploads", json={'sha256': content_hash, 'encoding': 'gzip'}, timeout=60)
+    response.raise_for_status()
+    reply = response.json()
+    if reply['status'] == 'duplicate':
+        return reply
+
+    received = set(reply.get('received', []))
+    for index, chunk in enumerate(chunks):
+        if index in received:
+            continue
+        for attempt in range(max_retries):
+            try:
+                response = http.put(
+                    f"{server_url}/uploads/{content_hash}/chunks/{index}",
+                    data=chunk,
+                    headers={'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': sha256_hex(chunk)},
+                    timeout=60,
+                )
+                response.raise_for_status()
+                break
+            except requests.RequestException:
+                if attempt == max_retries - 1:
+                    raise
+
+    response = http.post(f"{server_url}/uploads/{content_hash}/complete", json={'chunks': len(chunks)}, timeout=60)
+    response.raise_for_status()
+    return response.json()
+
+
+class UploadStore:
+    """Server-side staging area for chunked uploads, one directory per content hash
+
+    Chunks larger than max_chunk_size, indexes of max_chunks or more and
+    uploads that unpack to more than max_size bytes are rejected with
+    ValueError.
+    """
+
+    def __init__(self, root: str = "kg_uploads", max_chunk_size: int = MAX_CHUNK_SIZE,
+                 max_chunks: int = MAX_CHUNKS, max_size: int = MAX_UPLOAD_SIZE):
+        self.root = root
+        self.max_chunk_size = max_chunk_size
+        self.max_chunks = max_chunks
+        self.max_size = max_size
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, content_hash: str) -> str:
+        # The hash names a directory, so refuse anything that is not one
+        if len(content_hash) != 64 or any(c not in '0123456789abcdef' for c in content_hash):
+            raise ValueError(f"Invalid content hash: {content_hash!r}")
+        return os.path.join(self.root, content_hash)
+
+    def received(self, content_hash: str) -> list:
+        """Indexes of the chunks already stored for an upload"""
+        path = self._dir(content_hash)
+        if not os.path.isdir(path):
+            return []
+        return sorted(int(name[:-len('.part')]) for name in os.listdir(path) if name.endswith('.part'))
+
+    def write_chunk(self, content_hash: str, index: int, data: bytes, chunk_hash: str) -> None:
+        """Store one chunk after checking it arrived intact"""
+        if not 0 <= index < self.max_chunks:
+            raise ValueError(f"Chunk index {index} out of range (max {self.max_chunks - 1})")
+        if len(data) > self.max_chunk_size:
+            raise ValueError(f"Chunk {index} is larger than {self.max_chunk_size} bytes")
+        if sha256_hex(data) != chunk_hash:
+            raise ValueError(f"Chunk {index} does not match its SHA-256")
+        path = self._dir(content_hash)
+        os.makedirs(path, exist_ok=True)
+        # Write then rename, so a dropped connection never leaves a partial chunk behind
+        tmp_path = os.path.join(path, f"{index}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(path, f"{index}.part"))
+
+    def assemble(self, content_hash: str, chunk_count: int) -> bytes:
+        """
+        Join, decompress and verify an upload, returning its NDJSON bytes
+
+        Raises ValueError if chunk_count does not fit the chunks stored,
+        listing any missing ones, if the content unpacks to more than
+        max_size bytes or if it does not match its hash.
+        """
+        received = self.received(content_hash)
+        # bool is an int subclass, but {"chunks": true} is not a count
+        if not isinstance(chunk_count, int) or isinstance(chunk_count, bool):
+            raise ValueError(f"Chunk count must be an integer, got {chunk_count!r}")
+        if not received or not 1 <= chunk_count <= received[-1] + 1:
+            raise ValueError(f"Chunk count {chunk_count} does not match the "
+                             f"{len(received)} chunks received")
+        missing = sorted(set(range(chunk_count)) - set(received))
+        if missing:
+            raise ValueError(f"Missing chunks: {missing}")
+
+        path = self._dir(content_hash)
+        parts = []
+        for index in range(chunk_count):
+            with open(os.path.join(path, f"{index}.part"), 'rb') as f:
+                parts.append(f.read())
+        # Unpack at most max_size + 1 bytes, so a gzip bomb cannot exhaust memory
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            data = decompressor.decompress(b''.join(parts), self.max_size + 1)
+        except zlib.error as e:
+            raise ValueError(f"Upload is not valid gzip: {e}") from None
+        if len(data) > self.max_size:
+            raise ValueError(f"Upload unpacks to more than {self.max_size} bytes")
+        if not decompressor.eof:
+            raise ValueError("Upload is truncated")
+        if sha256_hex(data) != content_hash:
+            raise ValueError("Upload does not match its SHA-256")
+        return data
+
+    def discard(self, content_hash: str) -> None:
+        shutil.rmtree(self._dir(content_hash), ignore_errors=True)
@@ -1,44 +1,53 @@
 import streamlit as st
-import PyPDF2
 import re
 from typing import Dict, List
-from pdfminer.high_level import extract_text
+from pdf_document import PdfDocument, open_with_backend
 
 class PDFTOCExtractor:
+    # The text TOC patterns were written against pdfminer's layout of each line
+    TEXT_TOC_BACKEND = 'pdfminer'
+
     def __init__(self, pdf_file):
         self.pdf_file = pdf_file
-        self.pdf_reader = PyPDF2.PdfReader(pdf_file)
+        # Set before opening, so __del__ works even if the upload cannot be parsed
+        self.doc = self.text_doc = None
+        # One parse of the upload serves the outline (PyMuPDF when available)
+        self.doc = PdfDocument(pdf_file)
+
+    def __del__(self):
+        if self.text_doc is not None and self.text_doc is not self.doc:
+            self.text_doc.close()
+        if self.doc is not None:
+            self.doc.close()
 
     def extract_built_in_toc(self) -> List[Dict]:
-        """Extract built-in table of contents if available"""
-        outline = self.pdf_reader.outline
-        if not outline:
-            return []
-
-        def process_outline(outline_item) -> List[Dict]:
-            result = []
-            for item in outline_item:
-                if isinstance(item, list):
-                    result.extend(process_outline(item))
-                else:
-                    try:
-                        skip_titles = ['appendix', 'appendices', 'index', 'preface', 'glossary', 'bibliography', 'references']
-                        if any(x in item.title.lower() for x in skip_titles):
-                            continue
-
-                        page_num = self.pdf_reader.get_destination_page_number(item)
-                        result.append({
-                            'title': item.title,
-                            'page': page_num + 1
-                        })
-                    except:
-                        continue
-            return result
-
-        return process_outline(outline)
-
-    def extract_text_toc(self) -> List[Dict]:
-        """Extract TOC by analyzing first few pages"""
+        """Extract built-in table of contents if available, with each entry's outline level"""
+        skip_titles = ['appendix', 'appendices', 'index', 'preface', 'glossary', 'bibliography', 'references']
+        return [
+            item for item in self.doc.outline()
+            if not any(x in item['title'].lower() for x in skip_titles)
+        ]
+
+    def front_matter_texts(self, max_pages: int):
+        """
+        Yield the text of the first max_pages pages, one page at a time
+
+        Layout analysis only runs on the pages requested, and since pages
+        are produced lazily a caller that stops iterating never pays for
+        the rest.
+        """
+        if self.text_doc is None:
+            self.text_doc = open_with_backend(self.doc, self.pdf_file, self.TEXT_TOC_BACKEND)
+        for page_num in range(min(max_pages, self.doc.page_count)):
+            yield self.text_doc.page_text(page_num)
+
+    def extract_text_toc(self, stop_after_empty_pages: int = 2) -> List[Dict]:
+        """
+        Extract TOC by analyzing first few pages
+
+        Scanning stops once stop_after_empty_pages pages in a row have no
+        TOC-like lines after the TOC has started.
+        """
         toc_patterns = [
             r'^(?:Chapter\s*)?(\d+|[IVXLCDM]+)[.\s]+([^\d]+?)\.{2,}(\d+)$',
             r'^((?:Chapter|Section)\s*(?:\d+|[IVXLCDM]+)(?:\.\d+)*)\s+([^\d]+?)\s+(\d+)$',
@@ -46,13 +55,13 @@ class PDFTOCExtractor:
         ]
 
         toc_items = []
-        text = extract_text(self.pdf_file)
-        pages = text.split('\f')  # Split text into pages
+        page_count = self.doc.page_count
+        max_pages = min(int(page_count * 0.15), 20)
+        empty_pages = 0
 
-        max_pages = min(int(len(pages) * 0.15), 20)
-
-        for page_num in range(max_pages):
-            lines = pages[page_num].split('\n')
+        for page_text in self.front_matter_texts(max_pages):
+            lines = page_text.split('\n')
+            items_before_page = len(toc_items)
 
             for line in lines:
                 line = line.strip()
@@ -72,7 +81,7 @@ class PDFTOCExtractor:
                         groups = match.groups()
                         if len(groups) == 3:
                             page = int(groups[2])
-                            if page > len(pages):
+                            if page > page_count:
                                 continue
 
                             title = groups[1].strip()
@@ -86,6 +95,13 @@ class PDFTOCExtractor:
                             })
                         break
 
+            if toc_items and len(toc_items) == items_before_page:
+                empty_pages += 1
+                if empty_pages >= stop_after_empty_pages:
+                    break
+            else:
+                empty_pages = 0
+
         return toc_items
 
 
@@ -0,0 +1,50 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds: fail fast when the tunnel is down, but give the
+# model time to answer once connected
+TIMEOUT = (5, 60)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def make_session(pool_connections: int = 4, pool_maxsize: int = 16, retries: int = 3,
+                 backoff_factor: float = 0.5) -> requests.Session:
+    """
+    A requests.Session that keeps connections alive and retries transient failures
+
+    pool_connections is how many hosts keep a connection pool and
+    pool_maxsize how many open connections each pool keeps for reuse.
+    Connection errors and 502/503/504 responses (an ngrok tunnel whose
+    backend is restarting) are retried with exponential backoff. Read
+    timeouts are not retried, since the server may still be generating
+    the answer.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET', 'POST'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """The process-wide pooled session, created on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
@@ -0,0 +1,167 @@
+import asyncio
+import re
+import time
+import threading
+from typing import Callable, List, Optional
+
+try:
+    import aiohttp
+    _CLIENT_ERRORS = (aiohttp.ClientError,)
+except ImportError:
+    _CLIENT_ERRORS = ()
+
+
+# Errors worth retrying: the host was slow, busy or briefly unreachable.
+# OSError covers requests' exceptions and aiohttp's connector errors, and
+# aiohttp.ClientError the rest of ainvoke's (e.g. ServerDisconnectedError)
+TRANSIENT_ERRORS = (asyncio.TimeoutError, TimeoutError, OSError) + _CLIENT_ERRORS
+
+# Ollama reports any non-200 reply as ValueError("Ollama call failed with status code N. ...")
+_STATUS_CODE = re.compile(r'status code (\d{3})')
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed backend call is worth retrying
+
+    True for TRANSIENT_ERRORS and for Ollama replies with a 5xx or 429
+    status (model loading, server busy or overloaded).
+    """
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, ValueError):
+        match = _STATUS_CODE.search(str(error))
+        return match is not None and (match.group(1).startswith('5') or match.group(1) == '429')
+    return False
+
+
+class InferenceBackend:
+    """Turns a list of rendered prompts into a list of raw completions.
+
+    max_batch_size tells the scheduler how many prompts to hand over per
+    generate() call, and max_concurrency how many requests one call may
+    have open at once, so the scheduler can bound the total.
+    """
+    name = "base"
+    max_batch_size = 1
+    max_concurrency = 1
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        raise NotImplementedError
+
+    async def agenerate(self, prompts: List[str]) -> List[str]:
+        """Async variant; falls back to running generate() in a worker thread"""
+        return await asyncio.to_thread(self.generate, prompts)
+
+
+class OllamaBackend(InferenceBackend):
+    """One LLM request per prompt (the builder's original behaviour)"""
+    name = "ollama"
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        return [self.llm.invoke(prompt) for prompt in prompts]
+
+    async def agenerate(self, prompts: List[str]) -> List[str]:
+        return [await self.llm.ainvoke(prompt) for prompt in prompts]
+
+
+class PooledOllamaBackend(InferenceBackend):
+    """One request per prompt to Ollama's generate API over a keep-alive session.
+
+    langchain's Ollama opens a fresh connection for every call (a bare
+    requests.post per invoke, a new aiohttp session per ainvoke). This
+    backend sends the same request through one pooled requests.Session
+    from http_client, so a long-lived builder reuses its connections to
+    the model host. Async calls run generate() in a worker thread.
+    """
+    name = "ollama-pooled"
+
+    def __init__(self, model: str = "mistral", base_url: str = "http://localhost:11434",
+                 temperature: float = 0.0, session=None, timeout: tuple = (5, 300)):
+        self.model = model
+        self.url = f"{base_url.rstrip('/')}/api/generate"
+        self.options = {"temperature": temperature}
+        self.timeout = timeout
+        if session is None:
+            from http_client import make_session
+            session = make_session()
+        self.session = session
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        completions = []
+        for prompt in prompts:
+            response = self.session.post(
+                self.url,
+                json={"model": self.model, "prompt": prompt, "stream": False, "options": self.options},
+                timeout=self.timeout,
+            )
+            if response.status_code != 200:
+                # Same message as langchain's Ollama, so is_transient() reads the status
+                raise ValueError(
+                    f"Ollama call failed with status code {response.status_code}. Details: {response.text}"
+                )
+            completions.append(response.json()["response"])
+        return completions
+
+
+class BatchedOllamaBackend(InferenceBackend):
+    """Sends up to max_batch_size prompts through the LLM's batch API at once.
+
+    Ollama's generate endpoint takes a single prompt, so llm.batch does
+    not pack them into one request: it sends one HTTP request per prompt
+    from a thread pool, at most max_concurrency at a time. The gain is
+    concurrency: with OLLAMA_NUM_PARALLEL > 1 on the server those requests
+    are decoded together on the GPU instead of queueing one after another.
+    A call lasts as long as its slowest prompt, so KnowledgeGraphBuilder
+    hands this backend one prompt per call and keeps batch_size calls in
+    flight (see plan_batches).
+    """
+    name = "ollama-batched"
+
+    def __init__(self, llm, max_batch_size: int = 8, max_concurrency: Optional[int] = None):
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency or max_batch_size
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        return self.llm.batch(prompts, config={"max_concurrency": self.max_concurrency})
+
+    async def agenerate(self, prompts: List[str]) -> List[str]:
+        return await self.llm.abatch(prompts, config={"max_concurrency": self.max_concurrency})
+
+
+class FakeBackend(InferenceBackend):
+    """Local stand-in for tests and benchmarks; never touches the network.
+
+    responder maps a prompt to its completion. latency is charged once per
+    generate() call and per_prompt_latency for every prompt in it, which is
+    enough to model both per-request and batched serving costs.
+    """
+    name = "fake"
+
+    def __init__(self, responder: Callable[[str], str] = None, max_batch_size: int = 1,
+                 latency: float = 0.0, per_prompt_latency: float = 0.0):
+        self.responder = responder or (lambda prompt: '{"prerequisites": []}')
+        self.max_batch_size = max_batch_size
+        self.latency = latency
+        self.per_prompt_latency = per_prompt_latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        with self._lock:
+            self.calls.append(len(prompts))
+        delay = self.latency + self.per_prompt_latency * len(prompts)
+        if delay:
+            time.sleep(delay)
+        return [self.responder(prompt) for prompt in prompts]
+
+    async def agenerate(self, prompts: List[str]) -> List[str]:
+        with self._lock:
+            self.calls.append(len(prompts))
+        delay = self.latency + self.per_prompt_latency * len(prompts)
+        if delay:
+            await asyncio.sleep(delay)
+        return [self.responder(prompt) for prompt in prompts]
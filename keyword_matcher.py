@@ -0,0 +1,76 @@
+from collections import deque
+from typing import Dict, Iterable, Set
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton for finding many substrings in one pass.
+
+    Each keyword carries a label (the keyword itself by default); labels()
+    returns every label whose keyword occurs anywhere in the text, with the
+    same substring semantics as ``keyword in text``.
+    """
+
+    def __init__(self, keywords: Iterable[str] = (), labels: Dict[str, str] = None):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        for keyword in keywords:
+            self._add(keyword, labels[keyword] if labels else keyword)
+        self._build_failure_links()
+
+    @classmethod
+    def from_groups(cls, groups: Dict[str, Iterable[str]]) -> "KeywordMatcher":
+        """Build a matcher whose labels are group names, e.g. complexity levels"""
+        labels = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                # Keep the first group that claims a keyword, like an ordered scan would
+                labels.setdefault(keyword, group)
+        return cls(labels.keys(), labels)
+
+    def _add(self, keyword: str, label: str) -> None:
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            node = next_node
+        self._output[node].add(label)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] |= self._output[self._fail[child]]
+
+    def _scan(self, text: str):
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._output[node]:
+                yield self._output[node]
+
+    def labels(self, text: str) -> Set[str]:
+        """Every label with a keyword occurring in text"""
+        found = set()
+        for output in self._scan(text):
+            found |= output
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        """True as soon as any keyword occurs in text"""
+        for _ in self._scan(text):
+            return True
+        return False
@@ -0,0 +1,424 @@
+import io
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Job states, in the order a job moves through them
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class LeaseLost(RuntimeError):
+    """A job's lease ran out and another worker has taken it over"""
+
+
+class JobStore:
+    """SQLite-backed queue of knowledge graph builds and their partial results.
+
+    Each job keeps its uploaded CSV, progress counters and every edge found
+    so far, so a client can poll for partial relationships while the build
+    runs. Several processes may share one database: a running job is
+    leased to the store that claimed it for lease_seconds, and its worker
+    pool renews the lease while the build runs. A job whose lease has run
+    out belonged to a process that died, and the next claim restarts it.
+    Every claim starts a new attempt, numbered from 1, so clients can tell
+    when a job's edges have started over.
+    """
+
+    def __init__(self, db_path: str = "kg_jobs.sqlite", lease_seconds: float = 60.0):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        # Names this store in the jobs it leases; unique per process and store
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+
+        # Flask request threads and the build workers share one connection
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                   id TEXT PRIMARY KEY,
+                   state TEXT NOT NULL,
+                   payload TEXT NOT NULL,
+                   processed INTEGER NOT NULL DEFAULT 0,
+                   total INTEGER NOT NULL DEFAULT 0,
+                   error TEXT,
+                   failed INTEGER NOT NULL DEFAULT 0,
+                   attempt INTEGER NOT NULL DEFAULT 0,
+                   content_hash TEXT,
+                   owner TEXT,
+                   lease_expires REAL,
+                   created REAL NOT NULL,
+                   updated REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS job_edges (
+                   job_id TEXT NOT NULL,
+                   seq INTEGER NOT NULL,
+                   prerequisite TEXT NOT NULL,
+                   topic TEXT NOT NULL,
+                   PRIMARY KEY (job_id, seq)
+               )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'content_hash' not in columns:
+            # Databases created before uploads were deduplicated
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN content_hash TEXT")
+        if 'owner' not in columns:
+            # Databases created before jobs were leased
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+        if 'failed' not in columns:
+            # Databases created before failed topics were counted
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN failed INTEGER NOT NULL DEFAULT 0")
+        if 'attempt' not in columns:
+            # Databases created before restarted jobs were numbered
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN attempt INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, created)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_content_hash ON jobs(content_hash)")
+        self._conn.commit()
+
+    def create(self, payload: str, content_hash: str = None) -> str:
+        """Queue a build of the given CSV text and return its job id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, state, payload, content_hash, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, payload, content_hash, now, now),
+            )
+            self._conn.commit()
+        return job_id
+
+    def find_by_hash(self, content_hash: str):
+        """Id of the newest job for this upload that has not failed, or None
+
+        Queued and running jobs count, so a second identical upload follows
+        the build already under way instead of starting another. A job that
+        finished with failed topics does not, so the book can be rebuilt
+        once the model host is back.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE content_hash = ? AND state != ? AND failed = 0 "
+                "ORDER BY created DESC LIMIT 1",
+                (content_hash, FAILED),
+            ).fetchone()
+        return row[0] if row else None
+
+    def claim(self):
+        """Lease the oldest queued or abandoned job and return (job_id, payload), or None
+
+        The update only succeeds if the job is still claimable, so when
+        several processes race for the same job exactly one wins and the
+        others move on to the next. An abandoned job (running, but with an
+        expired lease) starts over as a new attempt without its earlier edges.
+        """
+        with self._lock:
+            while True:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT id, payload, state FROM jobs "
+                    "WHERE state = ? OR (state = ? AND COALESCE(lease_expires, 0) < ?) "
+                    "ORDER BY created LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id, payload, state = row
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET state = ?, owner = ?, lease_expires = ?, processed = 0, failed = 0, "
+                    "attempt = attempt + 1, updated = ? "
+                    "WHERE id = ? AND (state = ? OR (state = ? AND COALESCE(lease_expires, 0) < ?))",
+                    (RUNNING, self.owner, now + self.lease_seconds, now, job_id, QUEUED, RUNNING, now),
+                ).rowcount
+                if not claimed:
+                    # Another process took it between the SELECT and the UPDATE
+                    self._conn.rollback()
+                    continue
+                if state == RUNNING:
+                    logger.warning(f"Job {job_id} was abandoned by its worker; restarting it")
+                    self._conn.execute("DELETE FROM job_edges WHERE job_id = ?", (job_id,))
+                self._conn.commit()
+                return job_id, payload
+
+    def renew_leases(self) -> int:
+        """Extend the lease on every job this store is running; returns how many"""
+        with self._lock:
+            renewed = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE state = ? AND owner = ?",
+                (time.time() + self.lease_seconds, RUNNING, self.owner),
+            ).rowcount
+            self._conn.commit()
+        return renewed
+
+    def _check_owned(self, cursor, job_id: str) -> None:
+        if cursor.rowcount == 0:
+            self._conn.rollback()
+            raise LeaseLost(f"Job {job_id} is no longer leased to this worker")
+
+    def record_progress(self, job_id: str, processed: int, total: int, edges: list) -> None:
+        """Append newly found edges and update the job's progress in one commit"""
+        with self._lock:
+            now = time.time()
+            # Also renews the lease, and fails if another process has taken the job over
+            self._check_owned(self._conn.execute(
+                "UPDATE jobs SET processed = ?, total = ?, updated = ?, lease_expires = ? "
+                "WHERE id = ? AND state = ? AND owner = ?",
+                (processed, total, now, now + self.lease_seconds, job_id, RUNNING, self.owner),
+            ), job_id)
+            next_seq = self._conn.execute(
+                "SELECT COUNT(*) FROM job_edges WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO job_edges (job_id, seq, prerequisite, topic) VALUES (?, ?, ?, ?)",
+                [(job_id, next_seq + i, edge['prerequisite'], edge['topic']) for i, edge in enumerate(edges)],
+            )
+            self._conn.commit()
+
+    def finish(self, job_id: str, error: str = None, failed: int = 0) -> None:
+        """
+        Mark a job this store is running done, or failed with an error message
+
+        failed is how many topics got no answer from the model; the job is
+        still done, with the edges of the other topics.
+        """
+        with self._lock:
+            self._check_owned(self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, failed = ?, updated = ?, lease_expires = NULL "
+                "WHERE id = ? AND state = ? AND owner = ?",
+                (FAILED if error else DONE, error, failed, time.time(), job_id, RUNNING, self.owner),
+            ), job_id)
+            self._conn.commit()
+
+    def get(self, job_id: str, since: int = 0, attempt: int = None):
+        """
+        The job's state, progress and edges from position since onwards, or None
+
+        Pass the previous response's 'next' as since and its 'attempt' as
+        attempt to fetch only new edges. If the job has been restarted since
+        then, its 'attempt' differs and the edges start again from position
+        0, replacing those the client already has.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, processed, total, error, failed, attempt FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if attempt is not None and attempt != row[5]:
+                since = 0
+            edges = self._conn.execute(
+                "SELECT prerequisite, topic FROM job_edges WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                (job_id, since),
+            ).fetchall()
+
+        state, processed, total, error, failed, job_attempt = row
+        if state == DONE:
+            progress = 100.0
+        else:
+            progress = round(100.0 * processed / total, 1) if total else 0.0
+        return {
+            'job_id': job_id,
+            'state': state,
+            'progress': progress,
+            'processed': processed,
+            'total': total,
+            'error': error,
+            'failed': failed,
+            'attempt': job_attempt,
+            'relationships': [{'prerequisite': p, 'topic': t} for p, t in edges],
+            'next': since + len(edges),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class BuilderPool:
+    """Long-lived KnowledgeGraphBuilders, created once and checked out per build.
+
+    Building a KnowledgeGraphBuilder sets up the LLM client, prompt
+    template, chain and response cache; keeping a few around lets every
+    job after the first skip that. Builders whose backend holds a pooled
+    session (PooledOllamaBackend) also keep their connections to the model
+    host open between jobs. A builder is only ever used by one build at a
+    time.
+    """
+
+    def __init__(self, factory, size: int = 1):
+        self.size = size
+        self._idle = queue.Queue()
+        start = time.perf_counter()
+        for _ in range(size):
+            self._idle.put(factory())
+        logger.info(f"Created {size} knowledge graph builders in {time.perf_counter() - start:.2f}s")
+
+    @contextmanager
+    def checkout(self, timeout: float = None):
+        """Borrow a builder, waiting for one to be returned if all are busy"""
+        builder = self._idle.get(timeout=timeout)
+        try:
+            yield builder
+        finally:
+            self._idle.put(builder)
+
+
+class JobWorkerPool:
+    """Threads that take queued jobs from a JobStore and build their graphs.
+
+    workers is how many books are built at once in this process and
+    batch_size how many LLM requests each build keeps in flight, so a
+    process sends at most workers * batch_size requests to the backend.
+    Each job checks a builder out of builders for the length of its build,
+    and a heartbeat thread renews the store's leases on running jobs.
+    """
+
+    def __init__(self, store: JobStore, builders: BuilderPool, workers: int = 1,
+                 batch_size: int = 4, poll_interval: float = 1.0):
+        self.store = store
+        self.builders = builders
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._heartbeat_thread = None
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"kg-job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="kg-job-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+        logger.info(f"Started {self.workers} knowledge graph job workers (batch size {self.batch_size})")
+
+    def submit(self, payload: str, content_hash: str = None) -> str:
+        """Queue a CSV payload and wake an idle worker"""
+        job_id = self.store.create(payload, content_hash)
+        self._wakeup.set()
+        return job_id
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop taking new jobs; builds already running are finished first"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        # Keep renewing leases until the last build has finished
+        self._stopped.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            claimed = self.store.claim()
+            if claimed is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id, payload = claimed
+            try:
+                with self.builders.checkout() as builder:
+                    failed = self.run_job(builder, job_id, payload)
+                self.store.finish(job_id, failed=failed)
+            except LeaseLost as e:
+                # The job now belongs to another worker, which reports its outcome
+                logger.warning(str(e))
+            except Exception as e:
+                logger.error(f"Knowledge graph job {job_id} failed: {str(e)}")
+                try:
+                    self.store.finish(job_id, error=str(e))
+                except LeaseLost as lost:
+                    logger.warning(str(lost))
+
+    def _heartbeat(self) -> None:
+        # Renew well before expiry, so a slow chunk never loses its job
+        while not self._stopped.wait(self.store.lease_seconds / 3):
+            try:
+                self.store.renew_leases()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew job leases: {str(e)}")
+
+    def run_job(self, builder, job_id: str, payload: str) -> int:
+        """
+        Build one job's graph, saving its edges and progress after every chunk
+
+        Returns how many topics failed because the backend call for them did.
+        """
+        df = pd.read_csv(io.StringIO(payload))
+        logger.info(f"Job {job_id}: building knowledge graph for {len(df)} rows")
+        pending = []
+        failed_topics = []
+
+        def on_progress(processed, total):
+            # Called before the chunk's edges are yielded, so these are the
+            # edges of the chunks completed before it
+            self.store.record_progress(job_id, processed, total, pending)
+            pending.clear()
+
+        for edge in builder.iter_relationships(df, self.batch_size, progress_callback=on_progress,
+                                               failed_topics=failed_topics):
+            pending.append(edge)
+        self.store.record_progress(job_id, len(df), len(df), pending)
+        if failed_topics:
+            logger.warning(f"Job {job_id}: {len(failed_topics)} of {len(df)} topics failed")
+        return len(failed_topics)
+
+
+def iter_job_events(store: JobStore, job_id: str, since: int = 0, attempt: int = None,
+                    poll_interval: float = 0.5, heartbeat: float = 15.0):
+    """
+    Follow a job, yielding events until it finishes
+
+    Events are dicts with an 'event' key: 'edge' (prerequisite, topic) for
+    each relationship from position since onwards, 'progress' (state,
+    attempt, progress, processed, total) whenever it changes, or at least
+    every heartbeat seconds so proxies keep the connection open, and a
+    final 'done' or 'failed' (with error and the number of failed topics).
+    since counts edges of the given attempt; when the job is on a later
+    one, a 'restart' event (attempt) comes first and the edges start over.
+    """
+    last_progress = None
+    last_sent = 0.0
+    while True:
+        job = store.get(job_id, since, attempt)
+        if job is None:
+            yield {'event': FAILED, 'error': f"Unknown job: {job_id}"}
+            return
+
+        if attempt is not None and job['attempt'] != attempt:
+            # Another worker restarted the job; drop the edges sent so far
+            yield {'event': 'restart', 'attempt': job['attempt']}
+        attempt = job['attempt']
+
+        for edge in job['relationships']:
+            yield dict(edge, event='edge')
+        since = job['next']
+
+        progress = (job['state'], attempt, job['processed'], job['total'])
+        if progress != last_progress or time.monotonic() - last_sent >= heartbeat:
+            yield {'event': 'progress', 'state': job['state'], 'attempt': attempt, 'progress': job['progress'],
+                   'processed': job['processed'], 'total': job['total'], 'next': since}
+            last_progress = progress
+            last_sent = time.monotonic()
+
+        if job['state'] in (DONE, FAILED):
+            yield {'event': job['state'], 'error': job['error'], 'failed': job['failed'], 'next': since}
+            return
+        time.sleep(poll_interval)
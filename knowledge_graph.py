@@ -1,19 +1,85 @@
 import pandas as pd
+import asyncio
 import json
-from langchain_community.llms import Ollama
-from langchain_core.prompts import PromptTemplate
-import torch
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import logging
+import random
 import re
+import time
+from functools import lru_cache
+from llm_cache import LLMResponseCache
+from keyword_matcher import KeywordMatcher
+from topic_index import TopicIndex
+from topic_context import TopicContextSelector
+from checkpoint_journal import CheckpointJournal
+from inference_backends import InferenceBackend, OllamaBackend, is_transient
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class KnowledgeGraphBuilder:
-    def __init__(self, model_name: str = "mistral"):
-        """Initialize the knowledge graph builder with improved validation"""
+    # Prerequisite suggestions that are section headings rather than concepts
+    SKIP_PATTERNS = [
+        r'^chapter\s+\d+',
+        r'introduction to',
+        r'overview of',
+        r'basics of',
+        r'fundamentals of',
+        r'getting started',
+        r'introduction$',
+        r'summary$',
+        r'review$',
+        r'exercises?$'
+    ]
+    SKIP_REGEX = re.compile('|'.join(f'(?:{pattern})' for pattern in SKIP_PATTERNS), re.IGNORECASE)
+
+    # Topic complexity levels, ordered from most basic to most advanced
+    COMPLEXITY_LEVELS = {
+        'basic': [
+            'syntax', 'variables', 'data types', 'operators', 'input output',
+            'control flow', 'loops', 'basic statements'
+        ],
+        'intermediate': [
+            'functions', 'arrays', 'strings', 'structs', 'pointers',
+            'references', 'file handling', 'basic classes'
+        ],
+        'advanced': [
+            'classes', 'inheritance', 'polymorphism', 'templates',
+            'exceptions', 'stl', 'smart pointers', 'move semantics'
+        ],
+        'expert': [
+            'design patterns', 'memory management', 'multithreading',
+            'advanced algorithms', 'optimization', 'meta programming'
+        ]
+    }
+    LEVEL_INDEX = {level: idx for idx, level in enumerate(COMPLEXITY_LEVELS)}
+    COMPLEXITY_MATCHER = KeywordMatcher.from_groups(COMPLEXITY_LEVELS)
+
+    def __init__(self, model_name: str = "mistral", cache_path: str = "llm_cache.sqlite",
+                 cache_max_bytes: int = 256 * 1024 * 1024, backend: InferenceBackend = None,
+                 context_topics: int = 15):
+        """Initialize the knowledge graph builder with improved validation
+
+        Pass cache_path=None to disable the on-disk LLM response cache.
+        backend defaults to one Ollama request per topic; pass a
+        PooledOllamaBackend, BatchedOllamaBackend or FakeBackend to change
+        how prompts are served.
+        context_topics is how many earlier, related topics each prompt lists
+        as candidates; None restores the first 1000 characters of all_topics.
+        """
+        # langchain is imported here rather than at module load so that importers
+        # such as ngrok_server.py start quickly and only pay for it when needed
+        from langchain_community.llms import Ollama
+        from langchain_core.prompts import PromptTemplate
+
+        self.model_name = model_name
+        self.context_topics = context_topics
+        self._context_selector = None
+        self._context_source = None
         self.llm = Ollama(
             model=model_name,
             temperature=0.0,
@@ -49,6 +115,10 @@ class KnowledgeGraphBuilder:
 
         # Initialize the chain
         self.chain = self.prompt_template | self.llm
+        self.backend = backend or OllamaBackend(self.llm)
+
+        # Responses are cached on disk so re-running an unchanged book skips the LLM
+        self.cache = LLMResponseCache(cache_path, cache_max_bytes) if cache_path else None
 
         # Expanded invalid patterns for general technical books
         self.invalid_patterns = [
@@ -69,6 +139,8 @@ class KnowledgeGraphBuilder:
             r'^\d+(\.\d+)*\s',
             r'^table of contents$',
         ]
+        self.invalid_topic_regex = re.compile('|'.join(f'(?:{pattern})' for pattern in self.invalid_patterns))
+        self.domain_matcher = None
 
         # Updated technical keywords to be more specific
         self.technical_keywords = {
@@ -119,87 +191,218 @@ class KnowledgeGraphBuilder:
             'software', 'language of'
         }
 
+        # Minimum TopicIndex score for mapping an LLM suggestion onto a book topic
+        self.prerequisite_match_threshold = 0.75
+
     def set_domain(self, domain: str):
         """Set the technical domain for keyword validation"""
         if domain in self.technical_keywords:
             self.current_domain = domain
+            self.domain_matcher = KeywordMatcher(self.technical_keywords[domain])
         else:
             raise ValueError(f"Unsupported domain: {domain}. Available domains: {list(self.technical_keywords.keys())}")
 
     def is_valid_topic(self, topic: str) -> bool:
         """Validate if a topic is legitimate for the current domain"""
+        topic_lower = topic.lower()
+
         # Check against invalid patterns
-        if any(re.match(pattern, topic.lower()) for pattern in self.invalid_patterns):
+        if self.invalid_topic_regex.match(topic_lower):
             return False
 
         # Check for domain-specific keywords if domain is set
-        if hasattr(self, 'current_domain'):
-            topic_lower = topic.lower()
-            domain_keywords = self.technical_keywords[self.current_domain]
-            return any(keyword in topic_lower for keyword in domain_keywords)
+        if self.domain_matcher is not None:
+            return self.domain_matcher.contains_any(topic_lower)
 
         # If no domain is set, accept any non-generic topic
         return True
 
     def process_topic(self, topic: str, content: str, all_topics: list) -> dict:
-        """Process a single topic with enhanced response parsing"""
-        try:
-            if not self.is_valid_topic(topic):
-                logger.info(f"Skipping invalid topic: {topic}")
-                return {"prerequisites": []}
+        """Process a single topic with enhanced response parsing; None if the backend call failed"""
+        return self.process_topics([(topic, content)], all_topics)[0]
+
+    def process_topics(self, items: list, all_topics: list) -> list:
+        """Process a batch of (topic, content) pairs with one backend call
+
+        Invalid topics and cached responses are resolved locally; only the
+        remaining prompts are sent to the inference backend. Topics whose
+        call failed get None instead of a result, so they are not
+        checkpointed as finished.
+        """
+        results, pending = self.prepare_topics(items, all_topics)
+        if pending:
+            try:
+                responses = self.backend.generate([prompt for _, _, _, prompt in pending])
+                self.finish_topics(results, pending, responses)
+            except Exception as e:
+                topics = ", ".join(topic for _, topic, _, _ in pending)
+                logger.error(f"Error processing topic {topics}: {str(e)}")
+                self.mark_failed(results, pending)
+        return results
+
+    def prepare_topics(self, items: list, all_topics: list) -> tuple:
+        """Validate topics and serve cache hits; return results and the prompts still to run"""
+        results = [{"prerequisites": []} for _ in items]
+        pending = []
+        for idx, (topic, content) in enumerate(items):
+            try:
+                if not self.is_valid_topic(topic):
+                    logger.info(f"Skipping invalid topic: {topic}")
+                    continue
 
-            logger.info(f"Processing topic: {topic}")
+                logger.info(f"Processing topic: {topic}")
+                topics_context = self.topic_context(topic, content, all_topics)
+                key = self.cache_key(topic, content, topics_context) if self.cache is not None else None
+                response = self.cached_response(topic, key) if key is not None else None
+                if response is not None:
+                    results[idx] = self.parse_response(topic, response)
+                else:
+                    pending.append((idx, topic, key, self.render_prompt(topic, content, topics_context)))
+            except Exception as e:
+                logger.error(f"Error processing topic {topic}: {str(e)}")
+                results[idx] = None
+        return results, pending
 
-            response = self.chain.invoke({
-                "topic": topic,
-                "content": content,
-                "all_topics": str(all_topics)[:1000]
-            })
+    def cached_response(self, topic: str, key: str):
+        """The cached response for key, or None on a miss
 
-            # Enhanced response parsing
+        A failed lookup (get also records the access, so it can hit
+        "database is locked" when builders share the cache file) is logged
+        and treated as a miss, so the topic is still sent to the backend.
+        """
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"Could not read cached response for topic {topic}: {str(e)}")
+            return None
+
+    def finish_topics(self, results: list, pending: list, responses: list) -> None:
+        """Cache and parse backend responses into their result slots
+
+        A failed cache write (e.g. "database is locked" while several
+        builders share the cache file) is logged and the response is still
+        used, so the rest of the chunk is not lost.
+        """
+        for (idx, topic, key, _), response in zip(pending, responses):
+            if key is not None:
+                try:
+                    self.cache.put(key, response)
+                except Exception as e:
+                    logger.warning(f"Could not cache response for topic {topic}: {str(e)}")
+            results[idx] = self.parse_response(topic, response)
+
+    @staticmethod
+    def mark_failed(results: list, pending: list) -> None:
+        """Set the result slots of prompts whose backend call failed to None"""
+        for idx, _, _, _ in pending:
+            results[idx] = None
+
+    async def aprocess_topics(self, items: list, all_topics: list, semaphore: asyncio.Semaphore,
+                              timeout: float = 120.0, max_retries: int = 3,
+                              backoff: float = 1.0) -> list:
+        """Async counterpart of process_topics with timeout and retry per backend call
+
+        Topics still failing after the retries get None, as in process_topics.
+        """
+        results, pending = self.prepare_topics(items, all_topics)
+        if not pending:
+            return results
+
+        prompts = [prompt for _, _, _, prompt in pending]
+        topics = ", ".join(topic for _, topic, _, _ in pending)
+        for attempt in range(max_retries + 1):
             try:
-                # First attempt: Find JSON pattern
-                json_pattern = r'\{[^{}]*\}'
-                matches = re.findall(json_pattern, response)
-                
-                if matches:
-                    for match in matches:
-                        try:
-                            result = json.loads(match)
-                            if isinstance(result, dict) and "prerequisites" in result:
-                                filtered_prereqs = self.validate_prerequisites(topic, result["prerequisites"])
-                                return {"prerequisites": filtered_prereqs}
-                        except json.JSONDecodeError:
-                            continue
-
-                # Second attempt: Extract prerequisites from text response
-                prereq_pattern = r'prerequisites"?\s*:?\s*\[(.*?)\]'
-                matches = re.findall(prereq_pattern, response, re.IGNORECASE)
-                
-                if matches:
-                    for match in matches:
-                        try:
-                            # Clean and parse the prerequisites
-                            prereqs = [
-                                p.strip(' "\'') 
-                                for p in match.split(',')
-                                if p.strip(' "\'')
-                            ]
-                            filtered_prereqs = self.validate_prerequisites(topic, prereqs)
-                            return {"prerequisites": filtered_prereqs}
-                        except Exception:
-                            continue
+                # Only the backend call holds a slot, so retries back off without blocking others
+                async with semaphore:
+                    responses = await asyncio.wait_for(self.backend.agenerate(prompts), timeout)
+                self.finish_topics(results, pending, responses)
+                break
+            except Exception as e:
+                if not is_transient(e):
+                    logger.error(f"Error processing topic {topics}: {str(e)}")
+                elif attempt == max_retries:
+                    logger.error(f"Giving up on topic {topics} after {attempt + 1} attempts: {e!r}")
+                else:
+                    delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+                    logger.warning(f"Transient error on topic {topics} ({e!r}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                self.mark_failed(results, pending)
+                break
+        return results
+
+    def prepare_context(self, all_topics: list, df: pd.DataFrame = None) -> None:
+        """Build the candidate-topic index once for a run over all_topics"""
+        if self.context_topics is None:
+            return
+        contents = {}
+        if df is not None:
+            contents = {
+                self.clean_topic_name(row['Title']): row['Content']
+                for _, row in df.iterrows()
+            }
+        self._context_selector = TopicContextSelector(all_topics, contents, k=self.context_topics)
+        self._context_source = all_topics
+
+    def topic_context(self, topic: str, content: str, all_topics: list) -> str:
+        """The "Available Topics" text for one prompt"""
+        if self.context_topics is None:
+            return str(all_topics)[:1000]
+        if self._context_source is not all_topics:
+            self.prepare_context(all_topics)
+        return str(self._context_selector.select(topic, content))
+
+    def render_prompt(self, topic: str, content: str, all_topics: str) -> str:
+        """Fill the prerequisite prompt template for one topic"""
+        return self.prompt_template.format(topic=topic, content=content, all_topics=all_topics)
+
+    def cache_key(self, topic: str, content: str, all_topics: str) -> str:
+        """Response-cache key for one rendered prompt"""
+        return LLMResponseCache.make_key(
+            self.model_name, self.prompt_template.template, topic, content, all_topics
+        )
 
-                # If no valid response found
-                logger.warning(f"Could not parse response for topic: {topic}")
-                return {"prerequisites": []}
+    def parse_response(self, topic: str, response: str) -> dict:
+        """Pull the prerequisites list out of a raw LLM response"""
+        try:
+            # First attempt: Find JSON pattern
+            json_pattern = r'\{[^{}]*\}'
+            matches = re.findall(json_pattern, response)
+            
+            if matches:
+                for match in matches:
+                    try:
+                        result = json.loads(match)
+                        if isinstance(result, dict) and "prerequisites" in result:
+                            filtered_prereqs = self.validate_prerequisites(topic, result["prerequisites"])
+                            return {"prerequisites": filtered_prereqs}
+                    except json.JSONDecodeError:
+                        continue
 
-            except Exception as e:
-                logger.warning(f"Error parsing response for topic {topic}: {str(e)}")
-                return {"prerequisites": []}
+            # Second attempt: Extract prerequisites from text response
+            prereq_pattern = r'prerequisites"?\s*:?\s*\[(.*?)\]'
+            matches = re.findall(prereq_pattern, response, re.IGNORECASE)
+            
+            if matches:
+                for match in matches:
+                    try:
+                        # Clean and parse the prerequisites
+                        prereqs = [
+                            p.strip(' "\'') 
+                            for p in match.split(',')
+                            if p.strip(' "\'')
+                        ]
+                        filtered_prereqs = self.validate_prerequisites(topic, prereqs)
+                        return {"prerequisites": filtered_prereqs}
+                    except Exception:
+                        continue
+
+            # If no valid response found
+            logger.warning(f"Could not parse response for topic: {topic}")
+            return {"prerequisites": []}
 
         except Exception as e:
-            logger.error(f"Error processing topic {topic}: {str(e)}")
+            logger.warning(f"Error parsing response for topic {topic}: {str(e)}")
             return {"prerequisites": []}
 
     def clean_topic_name(self, topic: str) -> str:
@@ -208,126 +411,335 @@ class KnowledgeGraphBuilder:
         cleaned = re.sub(r'^\d+\.?\d*\s*', '', topic)
         return cleaned.strip()
 
-    def build_knowledge_graph(self, df: pd.DataFrame, batch_size: int = 4) -> pd.DataFrame:
-        """Build knowledge graph with GPU-optimized batch processing"""
-        relationships = []
+    def collect_edges(self, topic: str, result: dict, topic_index: TopicIndex) -> list:
+        """Turn a processed topic's prerequisites into graph edges
+
+        Suggestions are resolved to canonical book topics through topic_index,
+        so near-misses such as "Poniter Variables" still map to "Pointer
+        Variables", while vague ones such as "Variables" are dropped.
+        """
+        edges = []
+        for prereq in result["prerequisites"]:
+            canonical = topic_index.resolve(prereq)
+            if canonical is None or canonical == topic:
+                continue
+            edge = {"prerequisite": canonical, "topic": topic}
+            if edge not in edges:
+                edges.append(edge)
+        return edges
+
+    def build_knowledge_graph(self, df: pd.DataFrame, batch_size: int = 4,
+                              all_topics: list = None, checkpoint_path: str = None,
+                              resume: bool = False) -> pd.DataFrame:
+        """Build knowledge graph with up to batch_size backend requests in flight
+
+        Collects everything iter_relationships yields into a DataFrame; see
+        there for the scheduling, all_topics and checkpoint options.
+        """
+        relationships = list(self.iter_relationships(
+            df, batch_size, all_topics=all_topics, checkpoint_path=checkpoint_path, resume=resume
+        ))
+        return pd.DataFrame(relationships)
+
+    def plan_batches(self, max_requests: int) -> tuple:
+        """(prompts per backend call, calls at once) keeping max_requests requests in flight
+
+        A backend that packs a call's prompts into one request gets chunks
+        of max_batch_size prompts. One that sends a request per prompt
+        (max_concurrency > 1) only returns when its slowest prompt does, so
+        it is handed one prompt per call and the window refills as each
+        request completes.
+        """
+        max_requests = max(1, max_requests)
+        if self.backend.max_concurrency > 1:
+            return 1, max_requests
+        return max(1, self.backend.max_batch_size), max_requests
+
+    def iter_relationships(self, df: pd.DataFrame, batch_size: int = 4, all_topics: list = None,
+                           checkpoint_path: str = None, resume: bool = False,
+                           progress_callback=None, failed_topics: list = None):
+        """Yield {"prerequisite", "topic"} edges as soon as each topic completes
+
+        Rows are grouped into chunks of prompts for the backend (see
+        plan_batches) and scheduled on a sliding window: as soon as one call
+        returns the next chunk is submitted, instead of waiting for a whole
+        batch. At most batch_size backend requests are in flight.
+
+        all_topics defaults to the cleaned titles of df; pass the full book's
+        topic list when df only holds a subset of rows.
+
+        With checkpoint_path set, every finished topic and its edges are
+        appended to a JSONL journal; resume=True skips topics already in it
+        and yields their journaled edges first.
+
+        progress_callback, if given, is called as (processed, total) after
+        every completed chunk. failed_topics, if given, is extended with the
+        topics whose backend call failed, which yield no edges.
+        """
         total_topics = len(df)
-        processed_topics = 0
         
         # Clean all topics before creating the list
-        logger.info("Cleaning topic names...")
-        all_topics = [self.clean_topic_name(title) for title in df['Title'].tolist()]
+        if all_topics is None:
+            logger.info("Cleaning topic names...")
+            all_topics = [self.clean_topic_name(title) for title in df['Title'].tolist()]
+        topic_index = TopicIndex(all_topics, self.prerequisite_match_threshold)
+        self.prepare_context(all_topics, df)
 
-        # Process in batches using ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=batch_size) as executor:
-            for i in range(0, len(df), batch_size):
-                batch = df.iloc[i:i+batch_size]
-                batch_size_actual = len(batch)
-                processed_topics += batch_size_actual
-                
-                # Calculate and display progress
-                progress = (processed_topics / total_topics) * 100
-                logger.info(f"Progress: {progress:.1f}% ({processed_topics}/{total_topics} topics) - "
-                           f"Batch {i//batch_size + 1}/{(len(df) + batch_size - 1)//batch_size}")
-
-                # Submit batch of topics for processing
-                future_to_topic = {
-                    executor.submit(
-                        self.process_topic,
-                        self.clean_topic_name(row['Title']),
-                        row['Content'],
-                        all_topics
-                    ): self.clean_topic_name(row['Title'])
-                    for _, row in batch.iterrows()
-                }
-
-                # Collect results
-                for future in future_to_topic:
-                    topic = future_to_topic[future]
-                    try:
-                        result = future.result()
-                        if result["prerequisites"]:
-                            for prereq in result["prerequisites"]:
-                                if prereq in all_topics and prereq != topic:
-                                    relationships.append({
-                                        "prerequisite": prereq,
-                                        "topic": topic
-                                    })
-                    except Exception as e:
-                        logger.error(f"Error processing topic {topic}: {str(e)}")
+        items = [(self.clean_topic_name(row['Title']), row['Content']) for _, row in df.iterrows()]
+        journal, items, restored = self.open_checkpoint(items, checkpoint_path, resume)
+        resumed_topics = processed_topics = total_topics - len(items)
+
+        chunk_size, window = self.plan_batches(batch_size)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        start_time = time.perf_counter()
 
+        try:
+            yield from restored
+            if progress_callback is not None and resumed_topics:
+                progress_callback(processed_topics, total_topics)
+
+            with ThreadPoolExecutor(max_workers=window) as executor:
+                in_flight = {}
+                next_chunk = 0
+                while next_chunk < len(chunks) or in_flight:
+                    # Keep the window full before waiting on the first completion
+                    while next_chunk < len(chunks) and len(in_flight) < window:
+                        future = executor.submit(self.process_topics, chunks[next_chunk], all_topics)
+                        in_flight[future] = chunks[next_chunk]
+                        next_chunk += 1
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk = in_flight.pop(future)
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            logger.error(f"Error processing batch: {str(e)}")
+                            results = [None for _ in chunk]
+
+                        edges = self.finish_chunk(chunk, results, topic_index, journal)
+                        if failed_topics is not None:
+                            failed_topics.extend(topic for (topic, _), result in zip(chunk, results)
+                                                 if result is None)
+                        processed_topics += len(chunk)
+                        self.log_progress(processed_topics, total_topics, start_time, resumed_topics)
+                        if progress_callback is not None:
+                            progress_callback(processed_topics, total_topics)
+                        yield from edges
+        finally:
+            if journal is not None:
+                journal.close()
+
+        self.log_finished(len(items), start_time, self.backend.name)
+
+    async def abuild_knowledge_graph(self, df: pd.DataFrame, max_concurrency: int = 4,
+                                     timeout: float = 120.0, max_retries: int = 3,
+                                     backoff: float = 1.0, all_topics: list = None,
+                                     checkpoint_path: str = None, resume: bool = False) -> pd.DataFrame:
+        """Async build_knowledge_graph with bounded concurrency, timeouts and retries
+
+        At most max_concurrency backend requests are in flight. Each call is
+        cancelled after timeout seconds and transient failures are retried
+        with exponential backoff, so one slow response only delays its own
+        topics. Checkpointing works as in build_knowledge_graph.
+        """
+        relationships = []
+        total_topics = len(df)
+
+        if all_topics is None:
+            all_topics = [self.clean_topic_name(title) for title in df['Title'].tolist()]
+        topic_index = TopicIndex(all_topics, self.prerequisite_match_threshold)
+        self.prepare_context(all_topics, df)
+
+        items = [(self.clean_topic_name(row['Title']), row['Content']) for _, row in df.iterrows()]
+        journal, items, restored = self.open_checkpoint(items, checkpoint_path, resume)
+        relationships.extend(restored)
+        resumed_topics = processed_topics = total_topics - len(items)
+
+        chunk_size, window = self.plan_batches(max_concurrency)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        semaphore = asyncio.Semaphore(window)
+        start_time = time.perf_counter()
+
+        async def run_chunk(chunk):
+            results = await self.aprocess_topics(chunk, all_topics, semaphore, timeout, max_retries, backoff)
+            return chunk, results
+
+        try:
+            for next_done in asyncio.as_completed([run_chunk(chunk) for chunk in chunks]):
+                chunk, results = await next_done
+                relationships.extend(self.finish_chunk(chunk, results, topic_index, journal))
+                processed_topics += len(chunk)
+                self.log_progress(processed_topics, total_topics, start_time, resumed_topics)
+        finally:
+            if journal is not None:
+                journal.close()
+
+        self.log_finished(len(items), start_time, f"async {self.backend.name}")
         return pd.DataFrame(relationships)
 
+    def open_checkpoint(self, items: list, checkpoint_path: str, resume: bool) -> tuple:
+        """Open the run's journal and split items into restored edges and work still to do
+
+        Returns (journal or None, remaining items, edges restored from the journal).
+        """
+        if not checkpoint_path:
+            return None, items, []
+
+        journal = CheckpointJournal(checkpoint_path, resume)
+        remaining = []
+        restored = []
+        for topic, content in items:
+            digest = self.content_hash(content)
+            if journal.is_done(topic, digest):
+                restored.extend(journal.edges_for(topic, digest))
+            else:
+                remaining.append((topic, content))
+        if resume:
+            logger.info(f"Skipping {len(items) - len(remaining)} checkpointed topics, "
+                        f"{len(remaining)} left to process")
+        return journal, remaining, restored
+
+    def finish_chunk(self, chunk: list, results: list, topic_index: TopicIndex,
+                     journal: CheckpointJournal = None) -> list:
+        """Resolve a finished chunk's edges and checkpoint them
+
+        Topics whose backend call failed (result None) have no edges and are
+        left out of the journal, so a resumed run retries them.
+        """
+        edges = []
+        entries = []
+        for (topic, content), result in zip(chunk, results):
+            if result is None:
+                continue
+            topic_edges = self.collect_edges(topic, result, topic_index)
+            edges.extend(topic_edges)
+            if journal is not None:
+                entries.append((topic, self.content_hash(content), topic_edges))
+        if journal is not None:
+            journal.record(entries)
+        return edges
+
+    def log_progress(self, processed_topics: int, total_topics: int, start_time: float,
+                     resumed_topics: int = 0) -> None:
+        """Emit a progress line with throughput and cache counters"""
+        progress = (processed_topics / total_topics) * 100 if total_topics else 100.0
+        elapsed = time.perf_counter() - start_time
+        rate = (processed_topics - resumed_topics) / elapsed if elapsed else 0.0
+        cache_stats = f" - {self.cache.stats()}" if self.cache is not None else ""
+        logger.info(f"Progress: {progress:.1f}% ({processed_topics}/{total_topics} topics) - "
+                    f"{rate:.2f} topics/sec{cache_stats}")
+
+    def log_finished(self, processed_topics: int, start_time: float, backend_name: str) -> None:
+        """Emit the end-of-run throughput summary"""
+        elapsed = time.perf_counter() - start_time
+        cache_stats = f" - {self.cache.stats()}" if self.cache is not None else ""
+        logger.info(f"Finished {processed_topics} topics in {elapsed:.1f}s "
+                    f"({processed_topics / elapsed if elapsed else 0:.2f} topics/sec) "
+                    f"using {backend_name} backend{cache_stats}")
+
+    @staticmethod
+    def content_hash(content) -> str:
+        """Hash a row's content for the incremental-build manifest"""
+        return hashlib.sha256(str(content).encode('utf-8')).hexdigest()
+
+    def build_manifest(self, df: pd.DataFrame) -> dict:
+        """Map each cleaned topic title to the hash of its content"""
+        return {
+            self.clean_topic_name(row['Title']): self.content_hash(row['Content'])
+            for _, row in df.iterrows()
+        }
+
+    def build_knowledge_graph_incremental(self, df: pd.DataFrame,
+                                          graph_path: str = 'FULLprerequisites_graph1.csv',
+                                          manifest_path: str = None,
+                                          batch_size: int = 4) -> pd.DataFrame:
+        """Rebuild only the topics whose content changed since the previous run
+
+        The previous run's (cleaned title -> content hash) manifest is stored
+        next to graph_path. Added and changed topics are re-processed, edges
+        touching removed topics are dropped, and the merged graph and new
+        manifest are written back to disk. Without a usable manifest or graph
+        this falls back to a full build.
+        """
+        if manifest_path is None:
+            manifest_path = os.path.splitext(graph_path)[0] + '_manifest.json'
+
+        new_manifest = self.build_manifest(df)
+        all_topics = [self.clean_topic_name(title) for title in df['Title'].tolist()]
+
+        old_manifest = {}
+        existing = pd.DataFrame(columns=['prerequisite', 'topic'])
+        if os.path.exists(manifest_path) and os.path.exists(graph_path):
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    old_manifest = json.load(f)
+                existing = pd.read_csv(graph_path)
+            except Exception as e:
+                logger.warning(f"Could not load previous build, doing a full rebuild: {str(e)}")
+                old_manifest = {}
+                existing = pd.DataFrame(columns=['prerequisite', 'topic'])
+
+        changed = {
+            topic for topic, digest in new_manifest.items()
+            if old_manifest.get(topic) != digest
+        }
+        removed = set(old_manifest) - set(new_manifest)
+        logger.info(f"Incremental build: {len(changed)} added/changed, {len(removed)} removed, "
+                    f"{len(new_manifest) - len(changed)} unchanged topics")
+
+        # Drop edges that will be regenerated or that point at removed topics
+        if not existing.empty:
+            stale = (existing['topic'].isin(changed | removed)
+                     | existing['prerequisite'].isin(removed))
+            existing = existing[~stale]
+
+        if changed:
+            changed_rows = df[df['Title'].map(self.clean_topic_name).isin(changed)]
+            new_edges = self.build_knowledge_graph(changed_rows, batch_size, all_topics=all_topics)
+        else:
+            new_edges = pd.DataFrame(columns=['prerequisite', 'topic'])
+
+        merged = pd.concat([existing, new_edges], ignore_index=True)
+        if not merged.empty:
+            merged = merged.drop_duplicates().reset_index(drop=True)
+
+        merged.to_csv(graph_path, index=False)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(new_manifest, f, indent=2)
+        logger.info(f"Merged graph with {len(merged)} relationships saved to {graph_path}")
+
+        return merged
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def complexity_level(text: str):
+        """Index of the most basic complexity level whose keywords occur in text, or None"""
+        levels = KnowledgeGraphBuilder.COMPLEXITY_MATCHER.labels(text.lower())
+        if not levels:
+            return None
+        return min(KnowledgeGraphBuilder.LEVEL_INDEX[level] for level in levels)
+
     def validate_prerequisites(self, topic: str, prerequisites: list) -> list:
         """Enhanced prerequisite validation with better filtering and consistency checks"""
         try:
-            # Enhanced skip patterns
-            skip_patterns = [
-                r'^chapter\s+\d+',
-                r'introduction to',
-                r'overview of',
-                r'basics of',
-                r'fundamentals of',
-                r'getting started',
-                r'introduction$',
-                r'summary$',
-                r'review$',
-                r'exercises?$'
-            ]
-            
-            # Define topic complexity levels
-            complexity_levels = {
-                'basic': [
-                    'syntax', 'variables', 'data types', 'operators', 'input output',
-                    'control flow', 'loops', 'basic statements'
-                ],
-                'intermediate': [
-                    'functions', 'arrays', 'strings', 'structs', 'pointers',
-                    'references', 'file handling', 'basic classes'
-                ],
-                'advanced': [
-                    'classes', 'inheritance', 'polymorphism', 'templates',
-                    'exceptions', 'stl', 'smart pointers', 'move semantics'
-                ],
-                'expert': [
-                    'design patterns', 'memory management', 'multithreading',
-                    'advanced algorithms', 'optimization', 'meta programming'
-                ]
-            }
+            # Skip if topic matches skip patterns
+            if self.SKIP_REGEX.search(topic):
+                return []
 
             # Determine topic complexity level
-            topic_level = None
-            topic_lower = topic.lower()
-            for level, keywords in complexity_levels.items():
-                if any(keyword in topic_lower for keyword in keywords):
-                    topic_level = level
-                    break
+            topic_idx = self.complexity_level(topic)
 
             cleaned_prereqs = []
-            
-            # Skip if topic matches skip patterns
-            if any(re.search(pattern, topic, re.IGNORECASE) for pattern in skip_patterns):
-                return []
-            
             for prereq in prerequisites:
-                if not prereq or any(re.search(pattern, prereq, re.IGNORECASE) for pattern in skip_patterns):
+                if not prereq or self.SKIP_REGEX.search(prereq):
                     continue
 
-                prereq_lower = prereq.lower()
-                
                 # Determine prerequisite complexity level
-                prereq_level = None
-                for level, keywords in complexity_levels.items():
-                    if any(keyword in prereq_lower for keyword in keywords):
-                        prereq_level = level
-                        break
+                prereq_idx = self.complexity_level(prereq)
 
                 # Validate complexity level relationship
-                if topic_level and prereq_level:
-                    levels = ['basic', 'intermediate', 'advanced', 'expert']
-                    topic_idx = levels.index(topic_level)
-                    prereq_idx = levels.index(prereq_level)
-                    
+                if topic_idx is not None and prereq_idx is not None:
                     # Only accept prerequisites that are 1-2 levels below current topic
                     if 0 <= topic_idx - prereq_idx <= 2:
                         cleaned_prereqs.append(prereq)
@@ -343,7 +755,7 @@ class KnowledgeGraphBuilder:
             logger.error(f"Error validating prerequisites: {str(e)}")
             return []
 
-def main():
+def main(incremental: bool = False, resume: bool = False):
     try:
         # Read and prepare data
         logger.info("Reading input file...")
@@ -370,12 +782,23 @@ def main():
         kg_builder.set_domain('programming')  # or 'database', 'networking', etc.
 
         # Build knowledge graph
-        relationships_df = kg_builder.build_knowledge_graph(df)
+        if incremental:
+            # Only re-process rows that changed since the last run; saves the merged graph itself
+            relationships_df = kg_builder.build_knowledge_graph_incremental(df, 'FULLprerequisites_graph1.csv')
+        else:
+            # Journal progress so an interrupted run can pick up with --resume
+            relationships_df = kg_builder.build_knowledge_graph(
+                df, checkpoint_path='FULLprerequisites_graph1_journal.jsonl', resume=resume
+            )
 
         # Save and display results
         if not relationships_df.empty:
-            relationships_df.to_csv('FULLprerequisites_graph1.csv', index=False)
-            logger.info("Results saved to prerequisites_graph.csv")
+            if not incremental:
+                relationships_df.to_csv('FULLprerequisites_graph1.csv', index=False)
+                # Keep the manifest in sync so a later incremental run can diff against this build
+                with open('FULLprerequisites_graph1_manifest.json', 'w', encoding='utf-8') as f:
+                    json.dump(kg_builder.build_manifest(df), f, indent=2)
+            logger.info("Results saved to FULLprerequisites_graph1.csv")
 
             print("\nPrerequisites Relationships:")
             print("-" * 80)
@@ -391,6 +814,6 @@ def main():
         logger.error(f"Error in main execution: {str(e)}")
 
 if __name__ == "__main__":
-    main()
+    main(incremental='--incremental' in sys.argv, resume='--resume' in sys.argv)
 
 
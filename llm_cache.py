@@ -0,0 +1,41 @@
+import hashlib
+
+from sqlite_lru import SQLiteLRUCache, content_key
+
+
+class LLMResponseCache(SQLiteLRUCache):
+    """Content-addressed, size-bounded SQLite cache for raw LLM responses
+
+    The builder calls the cache from its worker threads; see
+    SQLiteLRUCache for the shared connection and eviction.
+    """
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS responses (
+               key TEXT PRIMARY KEY,
+               response TEXT NOT NULL,
+               size INTEGER NOT NULL,
+               last_access REAL NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)",
+    )
+    TABLE = "responses"
+    label = "LLM cache"
+
+    def __init__(self, db_path: str = "llm_cache.sqlite", max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(db_path, max_bytes)
+
+    @staticmethod
+    def make_key(model_name: str, template: str, topic: str, content: str, all_topics: str) -> str:
+        """Build a stable key from everything that influences the LLM response"""
+        template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        return content_key(model_name, template_hash, topic, content, all_topics)
+
+    def _load(self, key: str):
+        row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _store(self, key: str, response: str, now: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, response, len(response.encode("utf-8")), now),
+        )
@@ -0,0 +1,97 @@
+"""
+Load test the knowledge graph server with concurrent uploads.
+
+Posts a section CSV N times at once, follows every job to the end and
+reports p50/p95 latency, both for the upload to be accepted and for the
+finished graph. The server shares one job between identical uploads, so
+each copy gets its own nonce column and is built separately; pass
+--same-payload to measure that deduplication instead:
+
+    python ngrok_server.py                      # in another shell
+    python load_test_kg_server.py -n 20
+    python load_test_kg_server.py --url https://<tunnel> -n 8 --rows 40
+    python load_test_kg_server.py -n 20 --same-payload
+"""
+import argparse
+import io
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run_upload(url: str, payload: bytes, poll_interval: float, timeout: float):
+    """Upload once and wait for the job; returns (accept_seconds, total_seconds, state, job_id)"""
+    start = time.perf_counter()
+    response = requests.post(f"{url}/process_knowledge_graph",
+                             files={'csv_file': ('content.csv', payload)}, timeout=60)
+    response.raise_for_status()
+    accepted = time.perf_counter() - start
+    job_id = response.json()['job_id']
+
+    while time.perf_counter() - start < timeout:
+        job = requests.get(f"{url}/jobs/{job_id}", params={'since': 1 << 30}, timeout=60).json()
+        if job['state'] in ('done', 'failed'):
+            return accepted, time.perf_counter() - start, job['state'], job_id
+        time.sleep(poll_interval)
+    return accepted, time.perf_counter() - start, 'timeout', job_id
+
+
+def make_payload(df: pd.DataFrame, nonce: str = None) -> bytes:
+    """The CSV upload, with a nonce column so the server cannot dedupe it"""
+    if nonce is not None:
+        df = df.assign(LoadTestNonce=nonce)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def report(name: str, values: list) -> None:
+    print(f"{name:<10} p50 {percentile(values, 50):7.2f}s   p95 {percentile(values, 95):7.2f}s   "
+          f"max {max(values):7.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--csv", default="Starting Out.csv")
+    parser.add_argument("-n", "--requests", type=int, default=10, help="uploads to send")
+    parser.add_argument("--concurrency", type=int, default=None, help="uploads in flight (default: all)")
+    parser.add_argument("--rows", type=int, default=None, help="only upload the first ROWS sections")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between job status checks")
+    parser.add_argument("--timeout", type=float, default=3600, help="give up on a job after this long")
+    parser.add_argument("--same-payload", action="store_true",
+                        help="send identical uploads, which the server folds into one job")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    if args.rows:
+        df = df.head(args.rows)
+    if args.same_payload:
+        payloads = [make_payload(df)] * args.requests
+    else:
+        payloads = [make_payload(df, uuid.uuid4().hex) for _ in range(args.requests)]
+
+    kind = "identical" if args.same_payload else "distinct"
+    print(f"{args.requests} {kind} uploads of {len(df)} sections ({len(payloads[0]) / 1024:.0f} KB) to {args.url}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency or args.requests) as executor:
+        results = list(executor.map(
+            lambda payload: run_upload(args.url, payload, args.poll, args.timeout), payloads
+        ))
+    elapsed = time.perf_counter() - start
+
+    states = [state for _, _, state, _ in results]
+    report("accepted", [accepted for accepted, _, _, _ in results])
+    report("finished", [total for _, total, _, _ in results])
+    print(f"{states.count('done')}/{len(states)} done in {elapsed:.2f}s "
+          f"({len(states) / elapsed:.2f} uploads/s) by {len({job_id for *_, job_id in results})} jobs")
@@ -1,8 +1,11 @@
 import streamlit as st
 from pdf_toc_extractor import PDFTOCExtractor
-from read_toc_file_AND_make_df import read_toc_file
+from section_cache import SectionCache
+from chunked_upload import upload_dataframe
 import tempfile
 import os
+import time
+import json
 import requests
 import pandas as pd
 import networkx as nx
@@ -27,8 +30,15 @@ def clean_title(title: str) -> str:
         
     return cleaned.strip()
 
-def display_knowledge_graph(relationships_df):
-    """Display the knowledge graph using Plotly"""
+def display_knowledge_graph(relationships_df, container=None, pos=None):
+    """
+    Display the knowledge graph using Plotly
+
+    container is where the chart goes (an st.empty() placeholder lets it
+    be redrawn in place). pos seeds the layout with earlier node
+    positions so a growing graph keeps its shape; the new positions are
+    returned.
+    """
     G = nx.from_pandas_edgelist(
         relationships_df,
         source='prerequisite',
@@ -36,7 +46,7 @@ def display_knowledge_graph(relationships_df):
         create_using=nx.DiGraph()
     )
     
-    pos = nx.spring_layout(G)
+    pos = nx.spring_layout(G, pos={node: xy for node, xy in (pos or {}).items() if node in G}, seed=42)
     
     edge_trace = go.Scatter(
         x=[], y=[], 
@@ -88,7 +98,126 @@ def display_knowledge_graph(relationships_df):
         )
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    (container or st).plotly_chart(fig, use_container_width=True)
+    return pos
+
+def wait_for_job(server_url, job_id, poll_interval=2.0, since=0, relationships=None, attempt=None):
+    """
+    Poll a knowledge graph job until it finishes, showing its progress
+
+    Returns (state, relationships, error). Only new relationships are
+    fetched on each poll; pass since, the attempt they belong to and the
+    relationships already received to carry on from an interrupted stream.
+    """
+    progress_bar = st.progress(0, text="Waiting for the server to start the build...")
+    relationships = list(relationships or [])
+    while True:
+        params = {'since': since}
+        if attempt is not None:
+            params['attempt'] = attempt
+        response = requests.get(f"{server_url}/jobs/{job_id}", params=params, timeout=60)
+        response.raise_for_status()
+        job = response.json()
+        if attempt is not None and job['attempt'] != attempt:
+            # The server restarted the build, so its edges start over
+            relationships.clear()
+        attempt = job['attempt']
+        relationships.extend(job['relationships'])
+        since = job['next']
+
+        if job['state'] in ('queued', 'running'):
+            progress_bar.progress(
+                min(int(job['progress']), 100),
+                text=f"Processed {job['processed']} of {job['total'] or '?'} topics, "
+                     f"{len(relationships)} prerequisites found"
+            )
+            time.sleep(poll_interval)
+            continue
+
+        progress_bar.empty()
+        return job['state'], relationships, job['error']
+
+def follow_job(server_url, job_id, graph_placeholder, redraw_interval=1.0, max_reconnects=3):
+    """
+    Stream a knowledge graph job, redrawing the graph as prerequisites arrive
+
+    Reads the server's NDJSON event stream. If the stream drops, it is
+    reopened from the last edge received (?since=); after max_reconnects
+    failures in a row the job is polled instead. If the server restarts
+    the build, the edges received so far are dropped. Returns (state,
+    relationships, error).
+    """
+    progress_bar = st.progress(0, text="Waiting for the server to start the build...")
+    relationships = []
+    pos = None
+    drawn = 0
+    last_draw = 0.0
+    failures = 0
+    attempt = None
+    state = None
+    while state is None:
+        try:
+            params = {'since': len(relationships)}
+            if attempt is not None:
+                params['attempt'] = attempt
+            response = requests.get(f"{server_url}/jobs/{job_id}/stream",
+                                    params=params, stream=True, timeout=(10, 120))
+            response.raise_for_status()
+            with response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    failures = 0
+                    if event['event'] == 'edge':
+                        relationships.append({'prerequisite': event['prerequisite'], 'topic': event['topic']})
+                    elif event['event'] == 'restart':
+                        relationships.clear()
+                        drawn = 0
+                        attempt = event['attempt']
+                    elif event['event'] == 'progress':
+                        attempt = event['attempt']
+                        progress_bar.progress(
+                            min(int(event['progress']), 100),
+                            text=f"Processed {event['processed']} of {event['total'] or '?'} topics, "
+                                 f"{len(relationships)} prerequisites found"
+                        )
+                    else:
+                        state, error = event['event'], event.get('error')
+                        break
+
+                    # Redraw at most once per redraw_interval, and only when the graph grew
+                    if len(relationships) > drawn and time.monotonic() - last_draw >= redraw_interval:
+                        pos = display_knowledge_graph(pd.DataFrame(relationships), graph_placeholder, pos)
+                        drawn = len(relationships)
+                        last_draw = time.monotonic()
+            if state is None:
+                # The server closed the stream before the job finished
+                raise requests.ConnectionError("Stream ended before the job finished")
+        except requests.RequestException:
+            # Covers refused connections, ChunkedEncodingError and ReadTimeout mid-stream
+            failures += 1
+            if attempt is None:
+                # Edges can only be resumed once we know which attempt they came from
+                relationships.clear()
+            if failures > max_reconnects:
+                progress_bar.empty()
+                state, relationships, error = wait_for_job(
+                    server_url, job_id, since=len(relationships), relationships=relationships,
+                    attempt=attempt
+                )
+                break
+            time.sleep(min(2 ** failures, 10))
+
+    progress_bar.empty()
+    if state == 'done' and relationships:
+        display_knowledge_graph(pd.DataFrame(relationships), graph_placeholder, pos)
+    return state, relationships, error
+
+@st.cache_resource
+def get_section_cache():
+    """One section cache per Streamlit server, shared across reruns and sessions"""
+    return SectionCache("section_cache.sqlite")
 
 # Initialize session state
 if 'show_graph' not in st.session_state:
@@ -173,34 +302,29 @@ if uploaded_file is not None:
             if st.button("Generate Knowledge Graph"):
                 with st.spinner("Processing... This may take a few minutes."):
                     try:
-                        # Process TOC and create DataFrame
-                        df = read_toc_file(toc_path, pdf_path)
+                        # Process TOC and create DataFrame (reused for a repeat upload of the same book and TOC)
+                        df = get_section_cache().read_toc_file(toc_path, pdf_path)
                         if df is not None:
                             # Filter short content
                             df = df[df['Content'].str.split().str.len() >= 50]
                             
-                            # Save temporary CSV
-                            csv_path = os.path.join(tempfile.gettempdir(), "temp_content.csv")
-                            df.to_csv(csv_path, index=False)
-                            
                             # Send to ngrok server
                             NGROK_URL = "2q2Talb1F4DdZMIBWywoqxqVTGR_2V4LEaUkEALEVNnPF52HX"  
                             
-                            with open(csv_path, 'rb') as f:
-                                files = {'csv_file': f}
-                                response = requests.post(
-                                    f"{NGROK_URL}/process_knowledge_graph",
-                                    files=files
-                                )
+                            # Compressed, resumable upload; an identical book reuses its earlier graph
+                            result = upload_dataframe(NGROK_URL, df)
                             
-                            if response.status_code == 200:
-                                result = response.json()
-                                if result['status'] == 'success':
-                                    # Create and display graph
-                                    relationships_df = pd.DataFrame(result['relationships'])
-                                    
-                                    st.subheader("Knowledge Graph")
-                                    display_knowledge_graph(relationships_df)
+                            if result.get('job_id'):
+                                # The server queues the build; the graph grows here as edges stream in
+                                st.subheader("Knowledge Graph")
+                                graph_placeholder = st.empty()
+                                state, relationships, error = follow_job(
+                                    NGROK_URL, result['job_id'], graph_placeholder
+                                )
+                                if state == 'done':
+                                    relationships_df = pd.DataFrame(
+                                        relationships, columns=['prerequisite', 'topic']
+                                    )
                                     
                                     # Save results
                                     output_filename = f"{uploaded_file.name}_knowledge_graph.csv"
@@ -215,7 +339,7 @@ if uploaded_file is not None:
                                             mime="text/csv"
                                         )
                                 else:
-                                    st.error("Failed to process knowledge graph")
+                                    st.error(f"Failed to process knowledge graph: {error}")
                             else:
                                 st.error("Error connecting to processing server")
                     
@@ -224,7 +348,7 @@ if uploaded_file is not None:
                     
                     finally:
                         # Cleanup temporary files
-                        for path in [csv_path, toc_path, pdf_path]:
+                        for path in [toc_path, pdf_path]:
                             try:
                                 if os.path.exists(path):
                                     os.unlink(path)
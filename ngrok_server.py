@@ -1,7 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 import pandas as pd
 from knowledge_graph import KnowledgeGraphBuilder
+from inference_backends import PooledOllamaBackend
+from kg_jobs import BuilderPool, JobStore, JobWorkerPool, iter_job_events
+from chunked_upload import UploadStore, ndjson_to_dataframe, sha256_hex
+import io
+import json
 import logging
+import os
+import threading
 from pyngrok import ngrok
 
 # Configure logging
@@ -10,30 +17,74 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Concurrency of this server process: books built at once, and LLM
+# requests each build keeps in flight
+JOB_WORKERS = int(os.environ.get('KG_JOB_WORKERS', '1'))
+JOB_BATCH_SIZE = int(os.environ.get('KG_JOB_BATCH_SIZE', '4'))
+JOB_DB_PATH = os.environ.get('KG_JOB_DB', 'kg_jobs.sqlite')
+UPLOAD_DIR = os.environ.get('KG_UPLOAD_DIR', 'kg_uploads')
+OLLAMA_URL = os.environ.get('KG_OLLAMA_URL', 'http://localhost:11434')
+
+REQUIRED_COLUMNS = ['Title', 'Content']
+
+_job_pool = None
+_job_pool_lock = threading.Lock()
+_uploads = UploadStore(UPLOAD_DIR)
+# Held while checking for a duplicate and queueing, so identical uploads share one job
+_submit_lock = threading.Lock()
+
+def make_builder():
+    # A pooled session per builder keeps its connections to Ollama open between jobs
+    kg_builder = KnowledgeGraphBuilder(backend=PooledOllamaBackend("mistral", OLLAMA_URL))
+    kg_builder.set_domain('programming')
+    return kg_builder
+
+def get_job_pool():
+    """
+    Create the builders and start the job workers once per process
+
+    Called at startup by __main__; under another WSGI server the first
+    request does it instead.
+    """
+    global _job_pool
+    with _job_pool_lock:
+        if _job_pool is None:
+            # One long-lived builder per worker, shared by every upload
+            builders = BuilderPool(make_builder, size=JOB_WORKERS)
+            _job_pool = JobWorkerPool(JobStore(JOB_DB_PATH), builders,
+                                      workers=JOB_WORKERS, batch_size=JOB_BATCH_SIZE)
+            _job_pool.start()
+        return _job_pool
+
+def submit_sections(df, content_hash):
+    """Queue a build of df unless an identical upload already has a job; returns (job_id, duplicate)"""
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError(f"CSV must contain columns: {REQUIRED_COLUMNS}")
+
+    pool = get_job_pool()
+    with _submit_lock:
+        job_id = pool.store.find_by_hash(content_hash)
+        if job_id is not None:
+            logger.info(f"Upload {content_hash[:12]} already processed by job {job_id}")
+            return job_id, True
+        logger.info(f"Received CSV with {len(df)} rows")
+        return pool.submit(df.to_csv(index=False), content_hash), False
+
 @app.route('/process_knowledge_graph', methods=['POST'])
 def process_knowledge_graph():
+    """Queue a knowledge graph build; poll /jobs/<job_id> for its progress and results"""
     try:
         # Get the CSV data from the request
         csv_data = request.files['csv_file']
-        
-        # Read the CSV data
-        df = pd.read_csv(csv_data)
-        logger.info(f"Received CSV with {len(df)} rows")
-        
-        # Initialize KG builder
-        kg_builder = KnowledgeGraphBuilder()
-        kg_builder.set_domain('programming')
-        
-        # Build knowledge graph
-        relationships_df = kg_builder.build_knowledge_graph(df)
-        
-        # Convert results to JSON
-        results = relationships_df.to_dict(orient='records')
-        
+        payload = csv_data.read()
+
+        # Reject malformed uploads now rather than in the worker
+        df = pd.read_csv(io.BytesIO(payload))
+        job_id, duplicate = submit_sections(df, sha256_hex(payload))
         return jsonify({
-            'status': 'success',
-            'relationships': results
-        })
+            'status': 'duplicate' if duplicate else 'queued',
+            'job_id': job_id
+        }), 202
         
     except Exception as e:
         logger.error(f"Error processing knowledge graph: {str(e)}")
@@ -42,6 +93,129 @@ def process_knowledge_graph():
             'message': str(e)
         }), 500
 
+@app.route('/uploads', methods=['POST'])
+def start_upload():
+    """
+    Begin (or resume) a chunked upload named by the SHA-256 of its NDJSON
+
+    If an identical upload already has a job, its id is returned and no
+    chunks need to be sent. See chunked_upload.py for the protocol.
+    """
+    try:
+        body = request.get_json()
+        content_hash = body['sha256']
+        if body.get('encoding', 'gzip') != 'gzip':
+            raise ValueError(f"Unsupported encoding: {body['encoding']}")
+
+        job_id = get_job_pool().store.find_by_hash(content_hash)
+        if job_id is not None:
+            return jsonify({
+                'status': 'duplicate',
+                'job_id': job_id
+            })
+        return jsonify({
+            'status': 'pending',
+            'upload_id': content_hash,
+            'received': _uploads.received(content_hash)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@app.route('/uploads/<content_hash>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(content_hash, index):
+    """Store one compressed chunk, checked against its X-Chunk-SHA256 header"""
+    try:
+        # Read one byte past the limit, so an oversized chunk is refused unread
+        data = request.stream.read(_uploads.max_chunk_size + 1)
+        _uploads.write_chunk(content_hash, index, data, request.headers.get('X-Chunk-SHA256', ''))
+        return jsonify({
+            'status': 'success',
+            'index': index
+        })
+
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@app.route('/uploads/<content_hash>/complete', methods=['POST'])
+def complete_upload(content_hash):
+    """Verify and unpack a finished upload, then queue (or reuse) its build"""
+    try:
+        data = _uploads.assemble(content_hash, request.get_json()['chunks'])
+        job_id, duplicate = submit_sections(ndjson_to_dataframe(data), content_hash)
+        _uploads.discard(content_hash)
+        return jsonify({
+            'status': 'duplicate' if duplicate else 'queued',
+            'job_id': job_id
+        }), 202
+
+    except Exception as e:
+        logger.error(f"Error completing upload {content_hash[:12]}: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Report a job's state, progress percentage and relationships found so far
+
+    Pass ?since=<next>&attempt=<attempt> from the previous response to
+    receive only new edges. If the job has been restarted since, the
+    response has a new attempt and lists its edges from the start.
+    """
+    job = get_job_pool().store.get(job_id, since=request.args.get('since', 0, type=int),
+                                   attempt=request.args.get('attempt', None, type=int))
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f"Unknown job: {job_id}"
+        }), 404
+    return jsonify(dict(job, status='success'))
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    """
+    Stream a job's progress and new relationships until it finishes
+
+    Sends newline-delimited JSON by default, or server-sent events when
+    the client accepts text/event-stream (or passes ?format=sse). Each
+    message is one event from iter_job_events; ?since=<n>&attempt=<n>
+    skips edges the client already has.
+    """
+    store = get_job_pool().store
+    since = request.args.get('since', 0, type=int)
+    attempt = request.args.get('attempt', None, type=int)
+    if store.get(job_id, since) is None:
+        return jsonify({
+            'status': 'error',
+            'message': f"Unknown job: {job_id}"
+        }), 404
+
+    use_sse = (request.args.get('format') == 'sse'
+               or request.accept_mimetypes.best == 'text/event-stream')
+
+    def generate():
+        for event in iter_job_events(store, job_id, since, attempt):
+            if use_sse:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield json.dumps(event) + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        # Ask reverse proxies (ngrok, nginx) not to buffer the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 def start_ngrok():
     # Start ngrok tunnel
     public_url = ngrok.connect(5000)
@@ -49,6 +223,9 @@ def start_ngrok():
     return public_url
 
 if __name__ == '__main__':
+    # Warm up the builders before the tunnel starts accepting uploads
+    get_job_pool()
+
     # Start ngrok tunnel
     public_url = start_ngrok()
     
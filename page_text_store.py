@@ -0,0 +1,41 @@
+from collections import OrderedDict
+
+
+class PageTextStore:
+    """Serves PdfDocument page text, extracting each page at most once.
+
+    Pages are extracted lazily on first access. With max_cached_pages set,
+    only that many pages are kept (least recently used are dropped), which
+    bounds memory on very large books at the cost of re-extracting a page
+    that is needed again after eviction.
+    """
+
+    def __init__(self, doc, max_cached_pages: int = None):
+        self.doc = doc
+        self.max_cached_pages = max_cached_pages
+        self.extractions = 0
+        self._pages = OrderedDict()
+
+    def preload(self, texts: dict) -> None:
+        """Seed the store with already extracted {page_num: text} pairs"""
+        for page_num, text in texts.items():
+            self._pages[page_num] = text
+        if self.max_cached_pages is not None:
+            while len(self._pages) > self.max_cached_pages:
+                self._pages.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.doc)
+
+    def __getitem__(self, page_num: int) -> str:
+        text = self._pages.get(page_num)
+        if text is not None:
+            self._pages.move_to_end(page_num)
+            return text
+
+        text = self.doc.page_text(page_num)
+        self.extractions += 1
+        self._pages[page_num] = text
+        if self.max_cached_pages is not None and len(self._pages) > self.max_cached_pages:
+            self._pages.popitem(last=False)
+        return text
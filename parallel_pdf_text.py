@@ -0,0 +1,63 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List
+
+
+def _extract_pages_pymupdf(path: str, page_numbers: List[int]) -> List[str]:
+    import fitz  # PyMuPDF
+    doc = fitz.open(path)
+    try:
+        return [doc[page_num].get_text() for page_num in page_numbers]
+    finally:
+        doc.close()
+
+
+def _extract_pages_pypdf2(path: str, page_numbers: List[int]) -> List[str]:
+    import PyPDF2
+    with open(path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[page_num].extract_text() for page_num in page_numbers]
+
+
+ENGINES = {
+    'pymupdf': _extract_pages_pymupdf,
+    'pypdf2': _extract_pages_pypdf2,
+}
+
+
+def _extract_shard(args):
+    """Worker entry point: open the PDF in this process and extract one shard"""
+    engine, path, page_numbers = args
+    return ENGINES[engine](path, page_numbers)
+
+
+def extract_page_texts(path: str, page_numbers: Iterable[int], workers: int = None,
+                       engine: str = 'pymupdf', min_pages_per_worker: int = 16) -> List[str]:
+    """
+    Extract the text of the given 0-based pages, in the order requested
+
+    Pages are split into contiguous shards and handed to a process pool in
+    which every worker opens its own copy of the document. Small jobs, or
+    workers=1, run serially in this process since starting a pool costs
+    more than it saves.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported engine: {engine}. Available engines: {list(ENGINES.keys())}")
+
+    page_numbers = list(page_numbers)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(page_numbers) // min_pages_per_worker)
+    if workers <= 1:
+        return ENGINES[engine](path, page_numbers)
+
+    # A few shards per worker keeps the pool busy when pages differ in cost
+    shard_count = workers * 4
+    shard_size = -(-len(page_numbers) // shard_count)
+    shards = [page_numbers[i:i + shard_size] for i in range(0, len(page_numbers), shard_size)]
+
+    texts = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() returns shards in submission order, so pages stay ordered
+        for shard_texts in executor.map(_extract_shard, [(engine, path, shard) for shard in shards]):
+            texts.extend(shard_texts)
+    return texts
@@ -0,0 +1,262 @@
+import io
+from typing import Dict, List
+
+
+def _read_source(source):
+    """Bytes of a path, bytes object or (uploaded) file-like object"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def walk_pypdf2_outline(reader) -> List[Dict]:
+    """
+    Flatten a PyPDF2 outline into {'title', 'page', 'level'} entries, in order
+
+    PyPDF2 nests an item's children in a list right after it. The tree is
+    walked with an explicit stack, so deep outlines cannot hit the
+    recursion limit, and destinations are resolved through a page
+    object id -> page index map built once, rather than a page lookup
+    per bookmark. Items whose destination cannot be resolved are skipped.
+    """
+    page_count = len(reader.pages)
+    page_index = {}
+    for idx, page in enumerate(reader.pages):
+        if page.indirect_reference is not None:
+            page_index[page.indirect_reference.idnum] = idx
+
+    result = []
+    stack = [(iter(reader.outline or []), 1)]
+    while stack:
+        items, level = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            continue
+        if isinstance(item, list):
+            stack.append((iter(item), level + 1))
+            continue
+
+        try:
+            page_ref = item.page
+            if hasattr(page_ref, 'idnum'):
+                page_num = page_index.get(page_ref.idnum)
+            elif isinstance(page_ref, int):
+                page_num = page_ref
+            else:
+                page_num = reader.get_destination_page_number(item)
+        except Exception:
+            continue
+        if page_num is not None and 0 <= page_num < page_count:
+            result.append({'title': item.title, 'page': page_num + 1, 'level': level})
+    return result
+
+
+class _PyMuPDFBackend:
+    name = 'pymupdf'
+
+    def __init__(self, source):
+        import fitz  # PyMuPDF
+        if isinstance(source, str):
+            self.doc = fitz.open(source)
+        else:
+            self.doc = fitz.open(stream=_read_source(source), filetype='pdf')
+
+    def page_count(self) -> int:
+        return len(self.doc)
+
+    def page_text(self, page_num: int) -> str:
+        return self.doc[page_num].get_text()
+
+    def outline(self) -> List[Dict]:
+        # get_toc() already resolves destinations to 1-based page numbers
+        return [
+            {'title': title, 'page': page, 'level': level}
+            for level, title, page in self.doc.get_toc(simple=True)
+            if page > 0
+        ]
+
+    def close(self) -> None:
+        self.doc.close()
+
+
+class _PyPDF2Backend:
+    name = 'pypdf2'
+
+    def __init__(self, source):
+        import PyPDF2
+        if isinstance(source, str):
+            self._file = open(source, 'rb')
+            self.reader = PyPDF2.PdfReader(self._file)
+        else:
+            self._file = None
+            self.reader = PyPDF2.PdfReader(io.BytesIO(_read_source(source)))
+
+    def page_count(self) -> int:
+        return len(self.reader.pages)
+
+    def page_text(self, page_num: int) -> str:
+        return self.reader.pages[page_num].extract_text()
+
+    def outline(self) -> List[Dict]:
+        return walk_pypdf2_outline(self.reader)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+class _PdfMinerBackend:
+    name = 'pdfminer'
+
+    def __init__(self, source):
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.layout import LAParams
+
+        self._file = open(source, 'rb') if isinstance(source, str) else io.BytesIO(_read_source(source))
+        self.document = PDFDocument(PDFParser(self._file))
+        # Page objects are cheap; layout analysis only happens in page_text
+        self.pages = list(PDFPage.create_pages(self.document))
+        self._resources = PDFResourceManager()
+        self._laparams = LAParams()
+
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page_text(self, page_num: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        output = io.StringIO()
+        device = TextConverter(self._resources, output, laparams=self._laparams)
+        try:
+            PDFPageInterpreter(self._resources, device).process_page(self.pages[page_num])
+        finally:
+            device.close()
+        return output.getvalue().rstrip('\f')
+
+    def _destination(self, dest, action):
+        """The [page_ref, ...] destination array of an outline item, or None"""
+        from pdfminer.pdftypes import resolve1
+        from pdfminer.psparser import PSLiteral
+
+        if dest is None and action is not None:
+            action = resolve1(action)
+            dest = action.get('D') if isinstance(action, dict) else None
+        dest = resolve1(dest)
+        if isinstance(dest, (str, bytes, PSLiteral)):
+            # Named destination, looked up in the document's name tree
+            dest = resolve1(self.document.get_dest(dest.name if isinstance(dest, PSLiteral) else dest))
+        if isinstance(dest, dict):
+            dest = resolve1(dest.get('D'))
+        return dest if isinstance(dest, list) and dest else None
+
+    def outline(self) -> List[Dict]:
+        from pdfminer.pdfdocument import PDFNoOutlines
+
+        page_index = {page.pageid: idx for idx, page in enumerate(self.pages)}
+        result = []
+        try:
+            for level, title, dest, action, _ in self.document.get_outlines():
+                try:
+                    dest = self._destination(dest, action)
+                except Exception:
+                    continue
+                page_num = page_index.get(getattr(dest[0], 'objid', None)) if dest else None
+                if page_num is not None:
+                    result.append({'title': title, 'page': page_num + 1, 'level': level})
+        except PDFNoOutlines:
+            return []
+        return result
+
+    def close(self) -> None:
+        self._file.close()
+
+
+BACKENDS = {
+    'pymupdf': _PyMuPDFBackend,
+    'pypdf2': _PyPDF2Backend,
+    'pdfminer': _PdfMinerBackend,
+}
+
+# Tried in order when no backend is named
+DEFAULT_BACKENDS = ('pymupdf', 'pypdf2', 'pdfminer')
+
+
+class PdfDocument:
+    """
+    One open PDF handle providing page count, page text and outline
+
+    Accepts a path, bytes or a file-like object (e.g. a Streamlit
+    UploadedFile). Without an explicit backend, PyMuPDF is used and
+    PyPDF2, then pdfminer, are fallbacks when it is not installed.
+
+    Outline entries are {'title', 'page', 'level'} with 1-based pages and
+    levels starting at 1 for top-level bookmarks.
+    """
+
+    def __init__(self, source, backend: str = None):
+        if backend is not None and backend not in BACKENDS:
+            raise ValueError(f"Unsupported backend: {backend}. Available backends: {list(BACKENDS.keys())}")
+
+        candidates = [backend] if backend else DEFAULT_BACKENDS
+        missing = []
+        for name in candidates:
+            try:
+                self._backend = BACKENDS[name](source)
+                break
+            except ImportError:
+                missing.append(name)
+        else:
+            raise ImportError(f"No PDF backend available (tried {', '.join(missing)}): pip install pymupdf")
+        self.backend = self._backend.name
+        self._page_count = self._backend.page_count()
+
+    def __len__(self) -> int:
+        return self._page_count
+
+    @property
+    def page_count(self) -> int:
+        return self._page_count
+
+    def page_text(self, page_num: int) -> str:
+        """Text of one 0-based page"""
+        return self._backend.page_text(page_num)
+
+    def outline(self) -> List[Dict]:
+        """The built-in table of contents, or [] if the PDF has none"""
+        return self._backend.outline()
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_with_backend(doc: PdfDocument, source, backend: str) -> PdfDocument:
+    """
+    doc itself if it already uses backend, else a second handle on source that does
+
+    For callers whose text parsing depends on one library's line layout.
+    Falls back to doc when that backend is not installed; close the result
+    only if it is not doc.
+    """
+    if doc.backend == backend:
+        return doc
+    try:
+        return PdfDocument(source, backend=backend)
+    except ImportError:
+        return doc
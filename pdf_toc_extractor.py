@@ -1,55 +1,44 @@
-import PyPDF2
 import re
 from typing import Dict, List, Tuple
+from pdf_document import PdfDocument, open_with_backend
 
 class PDFTOCExtractor:
+    # The text TOC patterns were written against PyPDF2's page text, which keeps
+    # a right-aligned page number on its title's line; PyMuPDF splits them apart
+    TEXT_TOC_BACKEND = 'pypdf2'
+
     def __init__(self, pdf_file):
         self.pdf_file = pdf_file
-        self.pdf_reader = None
+        self.doc = None
+        self.text_doc = None
 
     def read_pdf(self) -> None:
         """Open and read the PDF file"""
         try:
-            # Directly create PdfReader from the uploaded file
-            self.pdf_reader = PyPDF2.PdfReader(self.pdf_file)
+            # PyMuPDF (when available) serves the outline; the text TOC keeps PyPDF2
+            self.doc = PdfDocument(self.pdf_file)
+            self.text_doc = open_with_backend(self.doc, self.pdf_file, self.TEXT_TOC_BACKEND)
         except Exception as e:
             raise Exception(f"Error reading PDF: {str(e)}")
 
     def __del__(self):
         """Cleanup when object is destroyed"""
-        # No need to close file as we're using Streamlit's UploadedFile
-        pass
+        # The uploaded file itself belongs to Streamlit; only our handles are closed
+        if self.text_doc is not None and self.text_doc is not self.doc:
+            self.text_doc.close()
+        if self.doc is not None:
+            self.doc.close()
 
     def extract_built_in_toc(self) -> List[Dict]:
-        """Extract built-in table of contents if available"""
+        """Extract built-in table of contents if available, with each entry's outline level"""
         try:
-            outline = self.pdf_reader.outline
-            if not outline:
-                return []
-
-            def process_outline(outline_item) -> List[Dict]:
-                result = []
-                for item in outline_item:
-                    if isinstance(item, list):
-                        result.extend(process_outline(item))
-                    else:
-                        try:
-                            # Skip appendix, index, preface etc.
-                            skip_titles = ['appendix', 'appendices', 'index', 'preface',
-                                         'glossary', 'bibliography', 'references','symbols']
-                            if any(x in item.title.lower() for x in skip_titles):
-                                continue
-
-                            page_num = self.pdf_reader.get_destination_page_number(item)
-                            result.append({
-                                'title': item.title,
-                                'page': page_num + 1
-                            })
-                        except:
-                            continue
-                return result
-
-            return process_outline(outline)
+            # Skip appendix, index, preface etc.
+            skip_titles = ['appendix', 'appendices', 'index', 'preface',
+                         'glossary', 'bibliography', 'references','symbols']
+            return [
+                item for item in self.doc.outline()
+                if not any(x in item['title'].lower() for x in skip_titles)
+            ]
         except Exception:
             return []
 
@@ -62,10 +51,10 @@ class PDFTOCExtractor:
         ]
 
         toc_items = []
-        max_pages = min(int(len(self.pdf_reader.pages) * 0.15), 20)
+        max_pages = min(int(self.doc.page_count * 0.15), 20)
 
-        for page_num in range(max_pages):
-            text = self.pdf_reader.pages[page_num].extract_text()
+        # At most 20 pages are scanned, too few for a process pool to pay off
+        for text in (self.text_doc.page_text(page_num) for page_num in range(max_pages)):
             lines = text.split('\n')
 
             for line in lines:
@@ -90,7 +79,7 @@ class PDFTOCExtractor:
                         if len(groups) == 3:
                             # Validate page number is reasonable
                             page = int(groups[2])
-                            if page > len(self.pdf_reader.pages):
+                            if page > self.doc.page_count:
                                 continue
 
                             title = groups[1].strip()
@@ -1,4 +1,5 @@
 import requests
+from http_client import TIMEOUT, get_session
 
 # Fixed default ngrok URL (similar to how it's defined in chatbot_api.py)
 NGROK_URL = "https://7d4d-34-83-240-110.ngrok-free.app"
@@ -16,7 +17,7 @@ def get_quiz_on_topic(topic, ngrok_url=None):
     
     # Changed from POST with JSON payload to GET with query parameters
     try:
-        response = requests.get(f"{endpoint}?topic={requests.utils.quote(cpp_specific_topic)}", timeout=60)
+        response = get_session().get(f"{endpoint}?topic={requests.utils.quote(cpp_specific_topic)}", timeout=TIMEOUT)
         response.raise_for_status()  # Raises an exception for 4xx or 5xx errors
         data = response.json()
         return data.get("quiz", "No 'quiz' field in JSON response.")
@@ -1,36 +1,91 @@
 import pandas as pd
 import re
-import fitz  # PyMuPDF
 from difflib import SequenceMatcher
+from functools import lru_cache
+from collections import defaultdict, namedtuple
+from page_text_store import PageTextStore
+from pdf_document import PdfDocument
+from parallel_pdf_text import ENGINES, extract_page_texts
+from section_sinks import SECTION_COLUMNS, FULL_TEXT_COLUMNS, CSVSink, write_rows
+from section_text_store import SectionTextWriter
 
+@lru_cache(maxsize=65536)
 def clean_text(text):
     """Clean text by removing special characters and normalizing whitespace"""
     text = re.sub(r'[^\w\s]', ' ', text)
     text = ' '.join(text.split()).lower()
     return text
 
+@lru_cache(maxsize=65536)
+def bounded_similarity(clean1, clean2, threshold):
+    """
+    SequenceMatcher ratio of two cleaned strings, or 0.0 when it cannot exceed threshold
+
+    Cheap upper bounds (length ratio, then real_quick_ratio/quick_ratio)
+    reject most lines before the full ratio is computed.
+    """
+    total = len(clean1) + len(clean2)
+    if total == 0:
+        return 1.0
+    if 2 * min(len(clean1), len(clean2)) / total <= threshold:
+        return 0.0
+    matcher = SequenceMatcher(None, clean1, clean2)
+    if matcher.real_quick_ratio() <= threshold or matcher.quick_ratio() <= threshold:
+        return 0.0
+    return matcher.ratio()
+
 def text_similarity(text1, text2):
     """Calculate similarity ratio between two texts"""
     return SequenceMatcher(None, clean_text(text1), clean_text(text2)).ratio()
 
+class PageLines:
+    """A page's raw lines with their cleaned forms, computed once per page"""
+    def __init__(self, page_text):
+        self.lines = page_text.split('\n')
+        self.clean = [clean_text(line) for line in self.lines]
+
+    def first_exact(self, title_clean, start=0):
+        """Index of the first line from start containing title_clean, or len(lines)"""
+        for idx in range(start, len(self.clean)):
+            if title_clean in self.clean[idx]:
+                return idx
+        return len(self.clean)
+
+    def first_match(self, title_clean, start=0, min_similarity=0.6):
+        """
+        Index of the first line from start that contains title_clean or is
+        more than min_similarity similar to it, or -1
+
+        Fuzzy scoring only runs on the lines before the first exact hit.
+        """
+        exact = self.first_exact(title_clean, start)
+        for idx in range(start, exact):
+            if bounded_similarity(title_clean, self.clean[idx], min_similarity) > min_similarity:
+                return idx
+        return exact if exact < len(self.clean) else -1
+
+@lru_cache(maxsize=256)
+def page_lines(page_text):
+    """Shared PageLines for a page's text, so each page is split and cleaned once"""
+    return PageLines(page_text)
+
 def find_title_in_text(title, lines, similarity_threshold=0.8):
     """Find the most likely match for a title in text lines"""
     clean_title = clean_text(title)
     title_words = clean_title.split()
-    
-    best_match_idx = -1
-    best_match_score = 0
-    
-    for idx, line in enumerate(lines):
-        clean_line = clean_text(line)
-        
-        # Try exact match first
+    clean_lines = [clean_text(line) for line in lines]
+
+    # An exact hit anywhere wins over fuzzy matches
+    for idx, clean_line in enumerate(clean_lines):
         if clean_title in clean_line:
             return idx
-        
+
+    best_match_idx = -1
+    best_match_score = 0
+    for idx, clean_line in enumerate(clean_lines):
         # Check if all words from title appear in the line
         if all(word in clean_line for word in title_words):
-            similarity = text_similarity(clean_title, clean_line)
+            similarity = bounded_similarity(clean_title, clean_line, similarity_threshold)
             if similarity > similarity_threshold and similarity > best_match_score:
                 best_match_score = similarity
                 best_match_idx = idx
@@ -41,36 +96,25 @@ def extract_section_content(page_text, current_title, next_title=None, min_simil
     """
     Extract content for a specific section from page text with improved matching
     """
-    lines = page_text.split('\n')
+    page = page_lines(page_text)
+    lines = page.lines
     content = []
-    found_start = False
     
     # Clean titles for comparison
     current_title_clean = clean_text(current_title)
     next_title_clean = clean_text(next_title) if next_title else None
     
     # Try to find an exact match first, then fall back to fuzzy matching
-    for idx, line in enumerate(lines):
-        line_clean = clean_text(line)
-        
-        if not found_start:
-            # Try exact match first
-            if current_title_clean in line_clean:
-                found_start = True
-                content.append(line)
-                continue
-            
-            # Try fuzzy matching if exact match fails
-            similarity = text_similarity(current_title_clean, line_clean)
-            if similarity > min_similarity:
-                found_start = True
-                content.append(line)
-        else:
-            # Check if we've reached the next title
-            if next_title_clean:
-                if next_title_clean in line_clean or text_similarity(next_title_clean, line_clean) > min_similarity:
-                    break
-            content.append(line)
+    start_idx = page.first_match(current_title_clean, 0, min_similarity)
+    if start_idx >= 0:
+        end_idx = len(lines)
+        if next_title_clean:
+            # Stop at the line where the next section's title appears
+            next_idx = page.first_match(next_title_clean, start_idx + 1, min_similarity)
+            if next_idx >= 0:
+                end_idx = next_idx
+        content = lines[start_idx:end_idx]
+    found_start = start_idx >= 0
     
     # If no content found, try a more lenient approach
     if not content and found_start == False:
@@ -86,111 +130,213 @@ def extract_section_content(page_text, current_title, next_title=None, min_simil
     
     return '\n'.join(content).strip() if content else ""
 
-def read_toc_file(file_path, book_path):
+Section = namedtuple('Section', [
+    'title', 'start_page', 'end_page', 'shares_page', 'same_page_next_title', 'next_title'
+])
+
+def plan_sections(valid_entries):
     """
-    Read a TOC text file and convert it to a pandas DataFrame with start page, end page and content
+    Work out how every TOC entry's content is extracted, in one sweep
+
+    Entries are grouped by start page once, so finding the sections that
+    share a page (and the one following each of them) is a dict lookup
+    instead of a rescan of the whole TOC per entry.
     """
-    try:
-        # Read the text file
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        
-        # Initialize lists to store TOC data
-        titles = []
-        start_pages = []
-        contents = []
-        
-        # Common patterns to exclude (can be extended)
-        exclude_patterns = [
-            'cover', 'title page', 'copyright', 'contents', 'index',
-            'credits', 'about', 'preface', 'acknowledgments',
-            'appendix', 'glossary', 'references', 'bibliography'
-        ]
-        
-        valid_entries = []
-        # First pass: collect all valid entries
-        for line in lines:
-            line = line.strip()
-            if line:  # Skip empty lines
-                # Try different page number patterns
-                match = re.search(r'(.+?)\s*[\.\-]?\s*(\d+)\s*$', line)
-                if match:
-                    title = match.group(1).strip()
-                    title = re.sub(r'\s*\.+\s*$', '', title)  # Remove trailing dots
-                    
-                    title_lower = title.lower()
-                    should_exclude = any(pattern in title_lower for pattern in exclude_patterns)
-                    is_single_letter = len(title_lower.strip()) <= 1
-                    
-                    if not should_exclude and not is_single_letter:
-                        page = int(match.group(2))
-                        valid_entries.append((title, page))
-        
-        # Open PDF document
-        doc = fitz.open(book_path)
-        
-        # Process entries and extract content
-        for i, (title, start_page) in enumerate(valid_entries):
-            content_text = ""
-            current_page = start_page - 1  # 0-based page numbering
-            
-            # Determine the end page
-            if i < len(valid_entries) - 1:
-                next_entry = valid_entries[i + 1]
-                end_page = next_entry[1] - 1
-            else:
-                end_page = current_page + 1  # At least include the next page for the last entry
-            
-            # Get all entries that start on the current page
-            same_page_entries = [
-                (t, p) for t, p in valid_entries 
-                if p == start_page
-            ]
-            
-            # Extract content
-            if len(same_page_entries) > 1:
-                # Multiple sections on the same page
-                current_idx = same_page_entries.index((title, start_page))
-                next_title = same_page_entries[current_idx + 1][0] if current_idx + 1 < len(same_page_entries) else None
+    entries_by_page = defaultdict(list)
+    for entry in valid_entries:
+        entries_by_page[entry[1]].append(entry)
+
+    # Position of each entry within its page group; repeated entries use the first
+    position_on_page = {}
+    for group in entries_by_page.values():
+        for idx, entry in enumerate(group):
+            position_on_page.setdefault(entry, idx)
+
+    sections = []
+    for i, (title, start_page) in enumerate(valid_entries):
+        current_page = start_page - 1  # 0-based page numbering
+
+        # Determine the end page
+        if i < len(valid_entries) - 1:
+            next_title, next_page = valid_entries[i + 1]
+            end_page = next_page - 1
+        else:
+            next_title = None
+            end_page = current_page + 1  # At least include the next page for the last entry
+
+        same_page_entries = entries_by_page[start_page]
+        current_idx = position_on_page[(title, start_page)]
+        same_page_next_title = (same_page_entries[current_idx + 1][0]
+                                if current_idx + 1 < len(same_page_entries) else None)
+
+        sections.append(Section(title, start_page, end_page, len(same_page_entries) > 1,
+                                same_page_next_title, next_title))
+    return sections
+
+def section_pages(section, page_count):
+    """0-based pages read to extract a section"""
+    current_page = section.start_page - 1
+    if section.shares_page:
+        return [current_page]
+    return list(range(current_page, min(section.end_page, page_count)))
+
+def needed_pages(sections, page_count):
+    """Sorted 0-based pages that read_toc_file will read for these sections"""
+    needed = set()
+    for section in sections:
+        needed.update(section_pages(section, page_count))
+    return sorted(page for page in needed if 0 <= page < page_count)
+
+def parse_toc_entries(file_path):
+    """
+    Read a TOC text file into (title, page) entries, skipping front/back matter
+    """
+    # Read the text file
+    with open(file_path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    
+    # Common patterns to exclude (can be extended)
+    exclude_patterns = [
+        'cover', 'title page', 'copyright', 'contents', 'index',
+        'credits', 'about', 'preface', 'acknowledgments',
+        'appendix', 'glossary', 'references', 'bibliography'
+    ]
+    
+    valid_entries = []
+    for line in lines:
+        line = line.strip()
+        if line:  # Skip empty lines
+            # Try different page number patterns
+            match = re.search(r'(.+?)\s*[\.\-]?\s*(\d+)\s*$', line)
+            if match:
+                title = match.group(1).strip()
+                title = re.sub(r'\s*\.+\s*$', '', title)  # Remove trailing dots
                 
-                page = doc[current_page]
-                page_text = page.get_text()
-                content_text = extract_section_content(page_text, title, next_title)
-            else:
-                # Single section or spans multiple pages
-                for page_num in range(current_page, min(end_page, len(doc))):
-                    page = doc[page_num]
-                    page_text = page.get_text()
-                    
-                    if page_num == current_page:
-                        # First page - extract from title onwards
-                        content_text += extract_section_content(page_text, title) + "\n"
-                    elif page_num == end_page - 1 and i < len(valid_entries) - 1:
-                        # Last page - extract until next title
-                        content_text += extract_section_content(page_text, "", valid_entries[i + 1][0]) + "\n"
-                    else:
-                        # Middle pages - include all content
-                        content_text += page_text + "\n"
-            
-            # Clean up content
-            content_text = re.sub(r'\s+', ' ', content_text).strip()
-            if len(content_text) > 1000:
-                content_text = content_text[:997] + "..."
+                title_lower = title.lower()
+                should_exclude = any(pattern in title_lower for pattern in exclude_patterns)
+                is_single_letter = len(title_lower.strip()) <= 1
+                
+                if not should_exclude and not is_single_letter:
+                    page = int(match.group(2))
+                    valid_entries.append((title, page))
+    return valid_entries
+
+def truncate_content(content_text, max_chars=1000):
+    """Cut content to max_chars, ending in "..." when shortened; None keeps it whole"""
+    if max_chars is not None and len(content_text) > max_chars:
+        return content_text[:max_chars - 3] + "..."
+    return content_text
+
+def extract_section(section, pages, max_chars=1000):
+    """
+    Extract and normalise the content of one planned section
+
+    Content is truncated to max_chars; pass None for the full text.
+    """
+    title, start_page, end_page = section.title, section.start_page, section.end_page
+    content_text = ""
+    current_page = start_page - 1  # 0-based page numbering
+    
+    # Extract content
+    if section.shares_page:
+        # Multiple sections on the same page
+        page_text = pages[current_page]
+        content_text = extract_section_content(page_text, title, section.same_page_next_title)
+    else:
+        # Single section or spans multiple pages
+        for page_num in section_pages(section, len(pages)):
+            page_text = pages[page_num]
             
-            titles.append(title)
-            start_pages.append(start_page)
-            contents.append(content_text)
-        
+            if page_num == current_page:
+                # First page - extract from title onwards
+                content_text += extract_section_content(page_text, title) + "\n"
+            elif page_num == end_page - 1 and section.next_title is not None:
+                # Last page - extract until next title
+                content_text += extract_section_content(page_text, "", section.next_title) + "\n"
+            else:
+                # Middle pages - include all content
+                content_text += page_text + "\n"
+    
+    # Clean up content
+    content_text = re.sub(r'\s+', ' ', content_text).strip()
+    return truncate_content(content_text, max_chars)
+
+def iter_sections(file_path, book_path, max_cached_pages=None, workers=1, max_chars=1000):
+    """
+    Yield {'Title', 'Start_Page', 'Content'} rows one section at a time
+
+    Only the TOC entries are held in memory; each row is produced as soon
+    as its section has been extracted, so callers can write or process
+    early chapters while later ones are still being read. Content is
+    truncated to max_chars (None keeps the whole section).
+    """
+    valid_entries = parse_toc_entries(file_path)
+    sections = plan_sections(valid_entries)
+
+    # Open PDF document
+    doc = PdfDocument(book_path)
+    try:
+        pages = PageTextStore(doc, max_cached_pages)
+        if workers != 1 and max_cached_pages is None and doc.backend in ENGINES:
+            needed = needed_pages(sections, len(doc))
+            texts = extract_page_texts(book_path, needed, workers, engine=doc.backend)
+            pages.preload(dict(zip(needed, texts)))
+
+        for section in sections:
+            yield {
+                'Title': section.title,
+                'Start_Page': section.start_page,
+                'Content': extract_section(section, pages, max_chars)
+            }
+    finally:
         doc.close()
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Title': titles,
-            'Start_Page': start_pages,
-            'Content': contents
-        })
-        
-        return df
+
+def filter_min_words(rows, min_words=50):
+    """
+    Drop rows whose content has fewer than min_words words
+    """
+    for row in rows:
+        if len(row['Content'].split()) >= min_words:
+            yield row
+
+def store_full_text(rows, writer, max_chars=1000):
+    """
+    Move each row's full content into a SectionTextWriter blob
+
+    Yields the rows with Content cut to a max_chars preview plus the
+    Content_Offset/Content_Length that locate the full text in the blob.
+    Rows must come from iter_sections(..., max_chars=None).
+    """
+    for row in rows:
+        offset, length = writer.write(row['Content'])
+        yield dict(row,
+                   Content=truncate_content(row['Content'], max_chars),
+                   Content_Offset=offset,
+                   Content_Length=length)
+
+def read_toc_file(file_path, book_path, max_cached_pages=None, workers=1, full_text_path=None):
+    """
+    Read a TOC text file and convert it to a pandas DataFrame with start page, end page and content
+
+    Each PDF page's text is extracted once and shared by every section that
+    touches it; set max_cached_pages to bound memory on very large books.
+    With workers > 1 (or None for one per CPU) the pages the TOC refers to
+    are extracted up front by a process pool.
+
+    Content is cut to 1000 characters. With full_text_path set, the
+    untruncated text of every section is also written there as a
+    compressed blob, and the DataFrame gains Content_Offset and
+    Content_Length columns for reading it back with SectionTextStore.
+    """
+    try:
+        if full_text_path is None:
+            rows = list(iter_sections(file_path, book_path, max_cached_pages, workers))
+            return pd.DataFrame(rows, columns=SECTION_COLUMNS)
+
+        with SectionTextWriter(full_text_path) as writer:
+            rows = iter_sections(file_path, book_path, max_cached_pages, workers, max_chars=None)
+            rows = list(store_full_text(rows, writer))
+        return pd.DataFrame(rows, columns=FULL_TEXT_COLUMNS)
     
     except Exception as e:
         print(f"Error processing file: {e}")
@@ -198,22 +344,19 @@ def read_toc_file(file_path, book_path):
 
 if __name__ == "__main__":
     # Example usage
-    file_path = "PF and DS_toc.txt"
-    book_path = "PF and DS.pdf"
-
-    file_path1="Starting Out With C++ 8th Edition - Gaddis_toc.txt"
-    book_path1="Starting Out With C++ 8th Edition - Gaddis.pdf"
-
-
-    toc_df = read_toc_file(file_path, book_path)
-    toc_df1 = read_toc_file(file_path1, book_path1)
-    if toc_df is not None:
-        # Remove rows with content less than 50 words
-        toc_df = toc_df[toc_df['Content'].str.split().str.len() >= 50]
-        print(toc_df)
-        toc_df.to_csv('PF and DS.csv', index=False)
-    if toc_df1 is not None:
-        # Remove rows with content less than 50 words
-        toc_df1 = toc_df1[toc_df1['Content'].str.split().str.len() >= 50]
-        print(toc_df1)
-        toc_df1.to_csv('Starting Out.csv', index=False)    
\ No newline at end of file
+    books = [
+        ("PF and DS_toc.txt", "PF and DS.pdf", "PF and DS.csv"),
+        ("Starting Out With C++ 8th Edition - Gaddis_toc.txt",
+         "Starting Out With C++ 8th Edition - Gaddis.pdf", "Starting Out.csv"),
+    ]
+
+    for toc_path, pdf_path, csv_path in books:
+        try:
+            # Rows are written as they are extracted; sections under 50 words are dropped.
+            # Sections run in page order, so a few cached pages keep memory flat
+            rows = iter_sections(toc_path, pdf_path, max_cached_pages=16)
+            with CSVSink(csv_path) as sink:
+                written = write_rows(filter_min_words(rows, 50), sink)
+            print(f"Wrote {written} sections to {csv_path}")
+        except Exception as e:
+            print(f"Error processing file: {e}")
@@ -0,0 +1,110 @@
+import hashlib
+
+import pandas as pd
+
+from read_toc_file_AND_make_df import read_toc_file
+from section_sinks import SECTION_COLUMNS
+from sqlite_lru import SQLiteLRUCache, content_key
+
+# Bump when read_toc_file's output for the same inputs changes
+EXTRACTION_VERSION = "1"
+
+
+def normalize_toc_text(text: str) -> str:
+    """Collapse whitespace and drop blank lines so cosmetic TOC edits share a key"""
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SectionCache(SQLiteLRUCache):
+    """Size-bounded SQLite cache of read_toc_file tables, keyed by PDF and TOC content
+
+    Repeat uploads of the same book with the same TOC return the stored
+    Title/Start_Page/Content table instead of re-reading the PDF. Once the
+    stored content exceeds max_bytes, the least recently used books are
+    dropped. Streamlit reruns the script on several threads, which share
+    the cache's connection (see SQLiteLRUCache).
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS books (
+               key TEXT PRIMARY KEY,
+               size INTEGER NOT NULL,
+               last_access REAL NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS sections (
+               key TEXT NOT NULL,
+               position INTEGER NOT NULL,
+               title TEXT NOT NULL,
+               start_page INTEGER NOT NULL,
+               content TEXT NOT NULL,
+               PRIMARY KEY (key, position)
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_books_last_access ON books(last_access)",
+    )
+    TABLE = "books"
+    VALUE_TABLES = ("sections",)
+    label = "Section cache"
+
+    def __init__(self, db_path: str = "section_cache.sqlite", max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(db_path, max_bytes)
+
+    @staticmethod
+    def make_key(pdf_path: str, toc_text: str, **options) -> str:
+        """Build a key from the PDF bytes, the normalized TOC and any extraction options"""
+        return content_key(
+            EXTRACTION_VERSION, file_sha256(pdf_path), normalize_toc_text(toc_text),
+            *(f"{name}={options[name]!r}" for name in sorted(options))
+        )
+
+    def _load(self, key: str):
+        if self._conn.execute("SELECT 1 FROM books WHERE key = ?", (key,)).fetchone() is None:
+            return None
+        rows = self._conn.execute(
+            "SELECT title, start_page, content FROM sections WHERE key = ? ORDER BY position", (key,)
+        ).fetchall()
+        return pd.DataFrame(rows, columns=SECTION_COLUMNS)
+
+    def _store(self, key: str, df: pd.DataFrame, now: float) -> None:
+        rows = [
+            (key, position, str(title), int(start_page), str(content))
+            for position, (title, start_page, content) in enumerate(df[SECTION_COLUMNS].itertuples(index=False))
+        ]
+        size = sum(len(title.encode("utf-8")) + len(content.encode("utf-8")) for _, _, title, _, content in rows)
+        self._conn.execute("DELETE FROM sections WHERE key = ?", (key,))
+        self._conn.executemany(
+            "INSERT INTO sections (key, position, title, start_page, content) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO books (key, size, last_access) VALUES (?, ?, ?)", (key, size, now)
+        )
+
+    def read_toc_file(self, toc_path: str, pdf_path: str, **options):
+        """
+        Cached read_toc_file: return the stored table for this PDF and TOC,
+        or extract it and store it. Failed extractions (None) are not cached.
+        Full-text extractions write a blob at a caller-chosen path that the
+        cache cannot vouch for, so they always run.
+        """
+        if options.get('full_text_path') is not None:
+            return read_toc_file(toc_path, pdf_path, **options)
+
+        with open(toc_path, 'r', encoding='utf-8') as f:
+            key = self.make_key(pdf_path, f.read(), **options)
+        df = self.get(key)
+        if df is not None:
+            return df
+
+        df = read_toc_file(toc_path, pdf_path, **options)
+        if df is not None:
+            self.put(key, df)
+        return df
@@ -0,0 +1,130 @@
+import csv
+import os
+
+SECTION_COLUMNS = ['Title', 'Start_Page', 'Content']
+# Sections whose full text lives in a SectionTextStore blob
+FULL_TEXT_COLUMNS = SECTION_COLUMNS + ['Content_Offset', 'Content_Length']
+
+
+def partial_path(path: str) -> str:
+    """Where a sink writes until it is closed, next to path so the final rename is atomic"""
+    return f"{path}.partial"
+
+
+class CSVSink:
+    """Writes section rows to a CSV file as they arrive, flushing after each one
+
+    Rows go to partial_path(path), which is renamed over path on a clean
+    close and deleted if the with block raises, so an error mid-book leaves
+    the previous file untouched. Pass atomic=False to write path directly.
+    """
+
+    def __init__(self, path: str, columns: list = None, atomic: bool = True):
+        self.path = path
+        self.columns = columns or SECTION_COLUMNS
+        self.write_path = partial_path(path) if atomic else path
+        self._file = open(self.write_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, lineterminator='\n')
+        self._writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        self._writer.writerow(row)
+        # Flush so readers following write_path see complete rows
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+            if self.write_path != self.path:
+                os.replace(self.write_path, self.path)
+
+    def abort(self) -> None:
+        """Stop writing and discard the partial file"""
+        if not self._file.closed:
+            self._file.close()
+            if self.write_path != self.path:
+                os.remove(self.write_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ParquetSink:
+    """Writes section rows to a Parquet file, one row group per batch_size rows
+
+    Requires pyarrow. Rows only become visible once their row group is
+    written, so smaller batches trade file compactness for latency. Like
+    CSVSink, the file is written to partial_path(path) and only replaces
+    path on a clean close.
+    """
+
+    def __init__(self, path: str, columns: list = None, batch_size: int = 64, atomic: bool = True):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetSink requires pyarrow: pip install pyarrow") from e
+
+        self.path = path
+        self.columns = columns or SECTION_COLUMNS
+        self.batch_size = batch_size
+        self.write_path = partial_path(path) if atomic else path
+        self._pa = pa
+        self._schema = pa.schema([
+            (column, pa.string() if column in ('Title', 'Content') else pa.int64())
+            for column in self.columns
+        ])
+        self._writer = pq.ParquetWriter(self.write_path, self._schema)
+        self._buffer = []
+
+    def write(self, row: dict) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            table = self._pa.Table.from_pylist(self._buffer, schema=self._schema)
+            self._writer.write_table(table)
+            self._buffer = []
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+            if self.write_path != self.path:
+                os.replace(self.write_path, self.path)
+
+    def abort(self) -> None:
+        """Stop writing and discard the partial file"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._buffer = []
+            if self.write_path != self.path:
+                os.remove(self.write_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_rows(rows, sink) -> int:
+    """Drain a row iterator into a sink, returning how many rows were written"""
+    written = 0
+    for row in rows:
+        sink.write(row)
+        written += 1
+    return written
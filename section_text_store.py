@@ -0,0 +1,107 @@
+import mmap
+import zlib
+
+# File header: magic, format version, compression flag
+MAGIC = b'SECTXT'
+VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+
+class SectionTextWriter:
+    """Appends full section texts to a single blob file.
+
+    Every text is stored as its own zlib stream (or raw UTF-8 with
+    compress=False), so a reader only has to decompress the section it
+    asks for. write() returns the (offset, length) pair that locates the
+    text in the blob; callers keep those in their section table.
+    """
+
+    def __init__(self, path: str, compress: bool = True, level: int = 6):
+        self.path = path
+        self.compress = compress
+        self.level = level
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + bytes([VERSION, int(compress)]))
+        self._offset = HEADER_SIZE
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        if self.compress:
+            data = zlib.compress(data, self.level)
+        offset = self._offset
+        self._file.write(data)
+        self._offset += len(data)
+        return offset, len(data)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SectionTextStore:
+    """Read-only, memory-mapped view of a blob written by SectionTextWriter.
+
+    raw() slices the mapping without copying; text() decodes (and, for
+    compressed blobs, decompresses) just the one section.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        header = bytes(self._view[:HEADER_SIZE])
+        if header[:len(MAGIC)] != MAGIC or header[len(MAGIC)] != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a section text blob")
+        self.compressed = bool(header[len(MAGIC) + 1])
+
+    def raw(self, offset: int, length: int) -> memoryview:
+        """
+        The stored bytes of one section, as a zero-copy view into the mapping
+
+        Release the view (or let it go out of scope) before closing the store.
+        """
+        return self._view[offset:offset + length]
+
+    def text(self, offset: int, length: int) -> str:
+        """The full text of one section"""
+        data = self.raw(offset, length)
+        if self.compressed:
+            return zlib.decompress(data).decode('utf-8')
+        return str(data, 'utf-8')
+
+    def close(self) -> None:
+        """
+        Unmap the blob and close its file
+
+        Raises BufferError if views returned by raw() are still alive. The
+        file is closed either way, and calling close() again once those
+        views are released unmaps the blob.
+        """
+        try:
+            if self._view is not None:
+                self._view.release()
+                self._view = None
+            if not self._mmap.closed:
+                try:
+                    self._mmap.close()
+                except BufferError:
+                    raise BufferError(
+                        f"Cannot unmap {self.path}: views returned by raw() are still in use"
+                    ) from None
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(*parts) -> str:
+    """SHA-256 over the parts in order, for keys built from everything that affects a value"""
+    digest = hashlib.sha256()
+    for part in parts:
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        encoded = str(part).encode("utf-8")
+        digest.update(str(len(encoded)).encode("ascii") + b":" + encoded)
+    return digest.hexdigest()
+
+
+class SQLiteLRUCache:
+    """Size-bounded SQLite cache that drops the least recently used entries first.
+
+    Subclasses list their CREATE statements in SCHEMA, name the table that
+    holds one (key, size, last_access) row per entry in TABLE, and
+    implement _load and _store for their values. Values kept in other
+    tables are listed in VALUE_TABLES (keyed by the same key) so eviction
+    and clear() remove them too. Callers on several threads share one
+    connection behind a lock.
+    """
+    SCHEMA = ()
+    TABLE = None
+    VALUE_TABLES = ()
+    label = "cache"
+
+    def __init__(self, db_path: str, max_bytes: int):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def _load(self, key: str):
+        """The stored value for key, or None; called with the lock held"""
+        raise NotImplementedError
+
+    def _store(self, key: str, value, now: float) -> None:
+        """Write value and its TABLE row; called with the lock held"""
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> None:
+        for table in self.VALUE_TABLES + (self.TABLE,):
+            self._conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            value = self._load(key)
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(f"UPDATE {self.TABLE} SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return value
+
+    def put(self, key: str, value) -> None:
+        """Store a value and evict least recently used entries if over budget"""
+        with self._lock:
+            self._store(key, value, time.time())
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop the oldest entries until the stored values fit in max_bytes"""
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.TABLE} ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._delete(key)
+            total -= size
+            evicted += 1
+        logger.info(f"{self.label} evicted {evicted} entries ({total} bytes remaining)")
+
+    def stats(self) -> str:
+        """Short hit/miss summary for progress log lines"""
+        return f"cache hits: {self.hits}, misses: {self.misses}"
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        with self._lock:
+            for table in self.VALUE_TABLES + (self.TABLE,):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({os.path.abspath(self.db_path)!r}, {self.stats()})"
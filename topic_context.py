@@ -0,0 +1,68 @@
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from topic_index import normalize_tokens
+
+
+class TopicContextSelector:
+    """Picks the candidate prerequisites shown to the LLM for each topic.
+
+    A TF-IDF index over every topic (title plus the start of its content)
+    is built once; for a given topic only the k most similar topics that
+    appear earlier in the book are returned.
+    """
+
+    def __init__(self, topics: List[str], contents: Optional[Dict[str, str]] = None,
+                 k: int = 15, content_chars: int = 500):
+        self.topics = list(topics)
+        self.k = k
+        self.content_chars = content_chars
+        self.contents = contents or {}
+        self._position = {}
+        for idx, topic in enumerate(self.topics):
+            self._position.setdefault(topic, idx)
+
+        term_counts = [self._terms(topic, self.contents.get(topic, '')) for topic in self.topics]
+        doc_freq = Counter()
+        for counts in term_counts:
+            doc_freq.update(counts.keys())
+        total = len(self.topics)
+        self._idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in doc_freq.items()}
+        self._postings = defaultdict(list)
+        for idx, counts in enumerate(term_counts):
+            for term, weight in self._weigh(counts).items():
+                self._postings[term].append((idx, weight))
+
+    def _terms(self, topic: str, content: str) -> Counter:
+        # Title words count double so headings dominate over body text
+        counts = Counter(normalize_tokens(topic) * 2)
+        counts.update(normalize_tokens(str(content)[:self.content_chars]))
+        return counts
+
+    def _weigh(self, counts: Counter) -> dict:
+        vector = {term: (1 + math.log(count)) * self._idf.get(term, 0.0) for term, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def select(self, topic: str, content: str = '') -> List[str]:
+        """Up to k earlier topics most similar to topic, in book order"""
+        query = self._weigh(self._terms(topic, content))
+        position = self._position.get(topic, len(self.topics))
+        if not query or position == 0:
+            return self.topics[:min(position, self.k)]
+
+        # Cosine similarity accumulated over the postings of the query's terms only
+        scores = defaultdict(float)
+        for term, query_weight in query.items():
+            for idx, weight in self._postings.get(term, ()):
+                if idx < position and self.topics[idx] != topic:
+                    scores[idx] += query_weight * weight
+
+        # Repeated headings (e.g. "Exercises") only take one slot
+        best = {}
+        for idx, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            if len(best) == self.k:
+                break
+            best.setdefault(self.topics[idx], idx)
+        return [self.topics[idx] for idx in sorted(best.values())]
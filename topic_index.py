@@ -0,0 +1,134 @@
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Iterable, List, Optional, Tuple
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lowercase, drop punctuation and reduce simple plurals ("Pointers" -> "pointer")"""
+    tokens = []
+    for token in re.sub(r'[^\w\s+#]', ' ', str(text).lower()).split():
+        if len(token) > 3:
+            if token.endswith('ies'):
+                token = token[:-3] + 'y'
+            elif token.endswith('sses'):
+                token = token[:-2]
+            elif token.endswith('s') and not token.endswith('ss'):
+                token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def char_ngrams(text: str, n: int = 3) -> set:
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+def token_similarity(a: str, b: str, cutoff: float = 0.8) -> float:
+    """How closely two words match, or 0.0 below cutoff ("poniter" ~ "pointer")"""
+    if abs(len(a) - len(b)) > max(len(a), len(b)) * (1 - cutoff):
+        return 0.0
+    ratio = SequenceMatcher(None, a, b).ratio()
+    return ratio if ratio >= cutoff else 0.0
+
+
+class TopicIndex:
+    """Resolves free-text prerequisite suggestions to canonical topic titles.
+
+    Exact hits go through a dict of normalized titles. Anything else is
+    scored against candidates drawn from token and character n-gram
+    postings, so only topics sharing some text with the suggestion are
+    ever compared. A fuzzy match must also beat the runner-up by margin,
+    so a bare "Variables" maps to neither "Pointer Variables" nor
+    "Variables and Literals".
+    """
+
+    def __init__(self, topics: Iterable[str], threshold: float = 0.75, ngram: int = 3,
+                 margin: float = 0.05):
+        self.threshold = threshold
+        self.margin = margin
+        self.ngram = ngram
+        self.topics = []
+        self._exact = {}
+        self._tokens = []
+        self._grams = []
+        self._token_postings = defaultdict(set)
+        self._gram_postings = defaultdict(set)
+
+        for topic in topics:
+            key = ' '.join(normalize_tokens(topic))
+            if not key or key in self._exact:
+                # Keep the first title for duplicate normalized keys
+                continue
+            idx = len(self.topics)
+            self.topics.append(topic)
+            self._exact[key] = topic
+            tokens = set(key.split())
+            grams = char_ngrams(key, ngram)
+            self._tokens.append(tokens)
+            self._grams.append(grams)
+            for token in tokens:
+                self._token_postings[token].add(idx)
+            for gram in grams:
+                self._gram_postings[gram].add(idx)
+
+    def __contains__(self, text: str) -> bool:
+        return self.resolve(text) is not None
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def score(self, tokens: set, idx: int) -> float:
+        """Similarity of a normalized suggestion's tokens to topic idx, in [0, 1]
+
+        Word overlap is counted against both sides, so a short suggestion
+        that only covers part of a longer title ("Functions" vs "Function
+        Templates") scores low. Misspelt words count by how closely they
+        match the nearest word of the title.
+        """
+        topic_tokens = self._tokens[idx]
+        shared = 0.0
+        for token in tokens:
+            if token in topic_tokens:
+                shared += 1
+            else:
+                shared += max(token_similarity(token, other) for other in topic_tokens)
+        return 2 * shared / (len(tokens) + len(topic_tokens))
+
+    def candidates(self, text: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Best-scoring topics for text, highest first"""
+        key = ' '.join(normalize_tokens(text))
+        if not key:
+            return []
+        if key in self._exact:
+            return [(self._exact[key], 1.0)]
+
+        tokens = set(key.split())
+        grams = char_ngrams(key, self.ngram)
+
+        # Shortlist topics sharing a word, or a good share of n-grams for misspellings
+        shortlist = set()
+        for token in tokens:
+            shortlist |= self._token_postings.get(token, set())
+        gram_hits = Counter()
+        for gram in grams:
+            gram_hits.update(self._gram_postings.get(gram, ()))
+        min_shared = max(1, len(grams) // 2)
+        shortlist.update(idx for idx, count in gram_hits.items() if count >= min_shared)
+
+        scored = [(self.topics[idx], self.score(tokens, idx)) for idx in shortlist]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def resolve(self, text: str) -> Optional[str]:
+        """Canonical topic for text, or None if no single topic clearly matches
+
+        The best candidate must reach the threshold and, unless it is an
+        exact hit, score at least margin above the runner-up.
+        """
+        best = self.candidates(text, limit=2)
+        if not best or best[0][1] < self.threshold:
+            return None
+        if len(best) > 1 and best[0][1] - best[1][1] < self.margin:
+            return None
+        return best[0][0]